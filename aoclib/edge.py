@@ -3,15 +3,19 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Hashable
 
 
 @dataclass
 class Edge:
-    u: int  # the "from" vertex
-    v: int  # the "to" vertex
+    u: Hashable  # the "from" vertex
+    v: Hashable  # the "to" vertex
+    weight: float = 1  # the cost of following the edge
 
     def __str__(self) -> str:
-        return f"{self.u} -> {self.v}"
+        if self.weight == 1:
+            return f"{self.u} -> {self.v}"
+        return f"{self.u} -> {self.v} ({self.weight})"
 
     def reversed(self) -> Edge:
-        return Edge(self.v, self.u)
+        return Edge(self.v, self.u, self.weight)
@@ -3,6 +3,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from heapq import heappop, heappush
+from itertools import count
+from math import ceil, sqrt
+from typing import Any, Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+# builds a NamedTuple without going through its generated __new__
+_new = tuple.__new__
 
 
 @dataclass
@@ -32,6 +39,38 @@ class Size:
         """Return the difference of two sizes."""
         return Size(self.cx - other.cx, self.cy - other.cy)
 
+    def freeze(self) -> FrozenSize:
+        """Return an immutable, hashable copy of the size."""
+        return FrozenSize(self.cx, self.cy)
+
+
+class FrozenSize(NamedTuple):
+    """An immutable, hashable Size.
+
+    Being a tuple it is cheap to build, compact and usable as a dict key or
+    search state.  Unlike a plain tuple, + and - work component-wise, with a
+    Size or a ``(cx, cy)`` pair as well.
+    """
+
+    cx: int = 0
+    cy: int = 0
+
+    def __add__(self, other: Union[Size, Tuple[int, int]]) -> FrozenSize:  # type: ignore[override]
+        """Return the sum of two sizes."""
+        if isinstance(other, Size):
+            return _new(FrozenSize, (self[0] + other.cx, self[1] + other.cy))
+        return _new(FrozenSize, (self[0] + other[0], self[1] + other[1]))
+
+    def __sub__(self, other: Union[Size, Tuple[int, int]]) -> FrozenSize:
+        """Return the difference of two sizes."""
+        if isinstance(other, Size):
+            return _new(FrozenSize, (self[0] - other.cx, self[1] - other.cy))
+        return _new(FrozenSize, (self[0] - other[0], self[1] - other[1]))
+
+    def thaw(self) -> Size:
+        """Return a mutable copy of the size."""
+        return Size(self[0], self[1])
+
 
 @dataclass
 class Point:
@@ -57,6 +96,84 @@ class Point:
         """Calculate the Manhattan distance between `self` and `other`."""
         return abs(self.x - other.x) + abs(self.y - other.y)
 
+    def freeze(self) -> FrozenPoint:
+        """Return an immutable, hashable copy of the point."""
+        return FrozenPoint(self.x, self.y)
+
+
+class FrozenPoint(NamedTuple):
+    """An immutable, hashable Point.
+
+    Being a tuple it is cheap to build, compact and usable as a dict key or
+    search state.  Unlike a plain tuple, + and - work component-wise, with a
+    Point or an ``(x, y)`` pair as well, and * scales by an integer.
+    """
+
+    x: int = 0
+    y: int = 0
+
+    def __add__(self, other: Union[Point, Tuple[int, int]]) -> FrozenPoint:  # type: ignore[override]
+        """Return the sum of two points."""
+        if isinstance(other, Point):
+            return _new(FrozenPoint, (self[0] + other.x, self[1] + other.y))
+        return _new(FrozenPoint, (self[0] + other[0], self[1] + other[1]))
+
+    def __sub__(self, other: Union[Point, Tuple[int, int]]) -> FrozenPoint:
+        """Return the difference of two points."""
+        if isinstance(other, Point):
+            return _new(FrozenPoint, (self[0] - other.x, self[1] - other.y))
+        return _new(FrozenPoint, (self[0] - other[0], self[1] - other[1]))
+
+    def __mul__(self, factor: int) -> FrozenPoint:  # type: ignore[override]
+        """Return the point scaled by `factor`."""
+        return _new(FrozenPoint, (self[0] * factor, self[1] * factor))
+
+    def __rmul__(self, factor: int) -> FrozenPoint:  # type: ignore[override]
+        """Return the point scaled by `factor`."""
+        return _new(FrozenPoint, (self[0] * factor, self[1] * factor))
+
+    def __neg__(self) -> FrozenPoint:
+        """Return the point reflected through the origin."""
+        return _new(FrozenPoint, (-self[0], -self[1]))
+
+    def offset(self, x_offset: int, y_offset: int) -> FrozenPoint:
+        """Return the point offset by the given values."""
+        return _new(FrozenPoint, (self[0] + x_offset, self[1] + y_offset))
+
+    def manhattan_distance(self, other: Union[Point, Tuple[int, int]]) -> int:
+        """Calculate the Manhattan distance between `self` and `other`."""
+        if isinstance(other, Point):
+            return abs(self[0] - other.x) + abs(self[1] - other.y)
+        return abs(self[0] - other[0]) + abs(self[1] - other[1])
+
+    def neighbors4(self) -> Tuple[FrozenPoint, ...]:
+        """Return the four orthogonally adjacent points."""
+        x, y = self
+        return (
+            _new(FrozenPoint, (x, y - 1)),
+            _new(FrozenPoint, (x + 1, y)),
+            _new(FrozenPoint, (x, y + 1)),
+            _new(FrozenPoint, (x - 1, y)),
+        )
+
+    def neighbors8(self) -> Tuple[FrozenPoint, ...]:
+        """Return the eight orthogonally and diagonally adjacent points."""
+        x, y = self
+        return (
+            _new(FrozenPoint, (x, y - 1)),
+            _new(FrozenPoint, (x + 1, y - 1)),
+            _new(FrozenPoint, (x + 1, y)),
+            _new(FrozenPoint, (x + 1, y + 1)),
+            _new(FrozenPoint, (x, y + 1)),
+            _new(FrozenPoint, (x - 1, y + 1)),
+            _new(FrozenPoint, (x - 1, y)),
+            _new(FrozenPoint, (x - 1, y - 1)),
+        )
+
+    def thaw(self) -> Point:
+        """Return a mutable copy of the point."""
+        return Point(self[0], self[1])
+
 
 @dataclass
 class Rectangle:
@@ -128,6 +245,12 @@ class Rectangle:
         """Return True if all values in the rectangle are 0."""
         return self.left == 0 and self.top == 0 and self.right == 0 and self.bottom == 0
 
+    def overlaps(self, other) -> bool:
+        """Return True if the intersection of the two rectangles is not empty."""
+        width = min(self.right, other.right) - max(self.left, other.left)
+        height = min(self.bottom, other.bottom) - max(self.top, other.top)
+        return width > 0 and height > 0
+
     def move_to_x(self, x: int) -> None:
         """Move the rectangle to the absolute coordinate specified by x."""
         self.right = self.width() + x
@@ -157,39 +280,89 @@ class Rectangle:
         self.right += x_offset
         self.bottom += y_offset
 
-    def __add__(self, rhs):
+    @staticmethod
+    def _displacement(rhs) -> Tuple[int, int, int, int]:
+        """Return the amounts by which `rhs` moves the left, top, right and bottom sides."""
+        if isinstance(rhs, (Point, FrozenPoint)):
+            return rhs.x, rhs.y, rhs.x, rhs.y
+        if isinstance(rhs, Rectangle):
+            return rhs.left, rhs.top, rhs.right, rhs.bottom
+        raise TypeError("rhs must be a Point or a Rect.")
+
+    def __add__(self, rhs) -> Rectangle:
+        """Return the rectangle displaced by the specified offsets."""
+        left, top, right, bottom = self._displacement(rhs)
+        return Rectangle(self.left + left, self.top + top, self.right + right, self.bottom + bottom)
+
+    def __iadd__(self, rhs) -> Rectangle:
         """Displace the rectangle by the specified offsets."""
-        new_rect = self
-        if isinstance(rhs, Point):
-            new_rect.left += rhs.x
-            new_rect.top += rhs.y
-            new_rect.right += rhs.x
-            new_rect.bottom += rhs.y
-        elif isinstance(rhs, Rectangle):
-            new_rect.left += rhs.left
-            new_rect.top += rhs.top
-            new_rect.right += rhs.right
-            new_rect.bottom += rhs.bottom
-        else:
-            raise TypeError("rhs must be a Point or a Rect.")
-        return new_rect
-
-    def __sub__(self, rhs):
-        """Displace the rectangle by the specified offsets."""
-        new_rect = self
-        if isinstance(rhs, Point):
-            new_rect.left -= rhs.x
-            new_rect.top -= rhs.y
-            new_rect.right -= rhs.x
-            new_rect.bottom -= rhs.y
-        elif isinstance(rhs, Rectangle):
-            new_rect.left -= rhs.left
-            new_rect.top -= rhs.top
-            new_rect.right -= rhs.right
-            new_rect.bottom -= rhs.bottom
-        else:
-            raise TypeError("rhs must be a Point or a Rect.")
-        return new_rect
+        left, top, right, bottom = self._displacement(rhs)
+        self.left += left
+        self.top += top
+        self.right += right
+        self.bottom += bottom
+        return self
+
+    def __sub__(self, rhs) -> Rectangle:
+        """Return the rectangle displaced by the negated offsets."""
+        left, top, right, bottom = self._displacement(rhs)
+        return Rectangle(self.left - left, self.top - top, self.right - right, self.bottom - bottom)
+
+    def __isub__(self, rhs) -> Rectangle:
+        """Displace the rectangle by the negated offsets."""
+        left, top, right, bottom = self._displacement(rhs)
+        self.left -= left
+        self.top -= top
+        self.right -= right
+        self.bottom -= bottom
+        return self
+
+    @staticmethod
+    def offset_many(rectangles: Iterable[Rectangle], x_offset: int, y_offset: int) -> None:
+        """Offset every rectangle in place by the given values."""
+        for rc in rectangles:
+            rc.left += x_offset
+            rc.top += y_offset
+            rc.right += x_offset
+            rc.bottom += y_offset
+
+    @classmethod
+    def union_all(cls, rectangles: Iterable[Rectangle]) -> Rectangle:
+        """Make a rectangle that is the union of all the given rectangles, null if none."""
+        iterator = iter(rectangles)
+        first = next(iterator, None)
+        if first is None:
+            return cls()
+        left, top, right, bottom = first.left, first.top, first.right, first.bottom
+        for rc in iterator:
+            if rc.left < left:
+                left = rc.left
+            if rc.top < top:
+                top = rc.top
+            if rc.right > right:
+                right = rc.right
+            if rc.bottom > bottom:
+                bottom = rc.bottom
+        return cls(left, top, right, bottom)
+
+    @classmethod
+    def intersect_all(cls, rectangles: Iterable[Rectangle]) -> Rectangle:
+        """Make a rectangle that is the intersection of all the given rectangles, null if none."""
+        iterator = iter(rectangles)
+        first = next(iterator, None)
+        if first is None:
+            return cls()
+        left, top, right, bottom = first.left, first.top, first.right, first.bottom
+        for rc in iterator:
+            if rc.left > left:
+                left = rc.left
+            if rc.top > top:
+                top = rc.top
+            if rc.right < right:
+                right = rc.right
+            if rc.bottom < bottom:
+                bottom = rc.bottom
+        return cls(left, top, right, bottom)
 
     def pt_in_rect(self, point: Point) -> bool:
         """Returns True if the given point is inside the rectangle."""
@@ -218,9 +391,28 @@ class Rectangle:
         """Get a Size object representing the width and height of the rectangle."""
         return Size(self.width(), self.height())
 
-    # def subtract_rect(lhs, rhs):
-    #     """Create a rectangle with dimensions equal to the subtraction of lhs from rhs."""
-    #     return Rectangle()
+    def subtract_rect(self, other) -> List[Rectangle]:
+        """Return disjoint rectangles that cover the part of this one outside `other`.
+
+        There are at most four: the bands above and below `other` span the
+        whole width, the pieces to its left and right fill the rows between.
+        """
+        if self.is_empty():
+            return []
+        if not self.overlaps(other):
+            return [Rectangle(self.left, self.top, self.right, self.bottom)]
+        pieces = []
+        top = max(self.top, other.top)
+        bottom = min(self.bottom, other.bottom)
+        if self.top < top:
+            pieces.append(Rectangle(self.left, self.top, self.right, top))
+        if self.left < other.left:
+            pieces.append(Rectangle(self.left, top, other.left, bottom))
+        if other.right < self.right:
+            pieces.append(Rectangle(other.right, top, self.right, bottom))
+        if bottom < self.bottom:
+            pieces.append(Rectangle(self.left, bottom, self.right, self.bottom))
+        return pieces
 
     def top_left(self) -> Point:
         """Return the top-left point of the rectangle."""
@@ -234,3 +426,243 @@ class Rectangle:
             max(self.right, other.right),
             max(self.bottom, other.bottom),
         )
+
+
+class _CoverageTree:
+    """A segment tree over the gaps between sorted y-coordinates.
+
+    Each node keeps how many rectangles cover its whole span and, for every
+    j up to k, the length of its span covered at least j times.  Updates
+    work bottom-up without recursion and counts are never pushed down, as
+    every removal matches an earlier insertion of the same span.
+    """
+
+    def __init__(self, ys: List[int], k: int) -> None:
+        self.k = k
+        self.leaves = 1
+        while self.leaves < len(ys) - 1:
+            self.leaves *= 2
+        self.counts = [0] * (2 * self.leaves)
+        self.covered: List[List[int]] = [[0] * (k + 1) for _ in range(2 * self.leaves)]
+        for i in range(len(ys) - 1):
+            self.covered[self.leaves + i][0] = ys[i + 1] - ys[i]
+        for node in range(self.leaves - 1, 0, -1):
+            self.covered[node][0] = self.covered[2 * node][0] + self.covered[2 * node + 1][0]
+
+    def _pull(self, node: int) -> None:
+        count = self.counts[node]
+        covered = self.covered[node]
+        full = covered[0]
+        if self.k == 1:
+            if count:
+                covered[1] = full
+            elif node >= self.leaves:
+                covered[1] = 0
+            else:
+                covered[1] = self.covered[2 * node][1] + self.covered[2 * node + 1][1]
+        elif node >= self.leaves:
+            for j in range(1, self.k + 1):
+                covered[j] = full if j <= count else 0
+        else:
+            left, right = self.covered[2 * node], self.covered[2 * node + 1]
+            for j in range(1, self.k + 1):
+                covered[j] = full if j <= count else left[j - count] + right[j - count]
+
+    def add(self, start: int, stop: int, delta: int) -> None:
+        """Add `delta` to the cover count of the gaps from ys[start] to ys[stop]."""
+        low, high = start + self.leaves, stop + self.leaves
+        first, last = low, high - 1
+        while low < high:
+            if low & 1:
+                self.counts[low] += delta
+                self._pull(low)
+                low += 1
+            if high & 1:
+                high -= 1
+                self.counts[high] += delta
+                self._pull(high)
+            low //= 2
+            high //= 2
+        first //= 2
+        last //= 2
+        while first:
+            self._pull(first)
+            if last != first:
+                self._pull(last)
+            first //= 2
+            last //= 2
+
+    def length(self) -> int:
+        """Return the length covered at least k times."""
+        return self.covered[1][self.k]
+
+
+def coverage_area(rectangles: Iterable[Rectangle], k: int = 1) -> int:
+    """Return the area covered by at least `k` of the rectangles.
+
+    A vertical line sweeps across the left and right edges in order while a
+    segment tree over the distinct y-coordinates tracks how much of the line
+    is covered k times, so the cost is O(n k log n) however large the
+    coordinates are.  Rectangles are half-open, as `Rectangle.width` and
+    `Rectangle.height` measure them, and empty ones are ignored.
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1.")
+    events: List[Tuple[int, int, int, int]] = []
+    ys = set()
+    for rc in rectangles:
+        if rc.is_empty():
+            continue
+        events.append((rc.left, 1, rc.top, rc.bottom))
+        events.append((rc.right, -1, rc.top, rc.bottom))
+        ys.add(rc.top)
+        ys.add(rc.bottom)
+    if not events:
+        return 0
+    events.sort()
+    sorted_ys = sorted(ys)
+    position = {y: i for i, y in enumerate(sorted_ys)}
+    tree = _CoverageTree(sorted_ys, k)
+    area = 0
+    previous_x = events[0][0]
+    for x, delta, top, bottom in events:
+        area += tree.length() * (x - previous_x)
+        previous_x = x
+        tree.add(position[top], position[bottom], delta)
+    return area
+
+
+def union_area(rectangles: Iterable[Rectangle]) -> int:
+    """Return the area covered by any of the rectangles, counting overlaps once."""
+    return coverage_area(rectangles, 1)
+
+
+class RectangleIndex:
+    """A static R-tree over rectangles for point, overlap and nearest queries.
+
+    The tree is bulk loaded with Sort-Tile-Recursive packing: the rectangles
+    are sorted into vertical slices by center x, each slice is sorted by
+    center y and cut into nodes of `capacity` entries, and the nodes are
+    packed the same way until one root is left.  Queries then visit only the
+    branches whose bounding boxes can match, roughly O(log n) each.
+
+    Queries return indices into `rectangles`.  The coordinates are copied when
+    the index is built, so later changes to the rectangles are not seen.
+    Containment includes the edges, as `Rectangle.pt_in_rect` does, while
+    overlapping, as in `Rectangle.overlaps`, needs a non-empty intersection.
+    """
+
+    def __init__(self, rectangles: Iterable[Rectangle], capacity: int = 16) -> None:
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2.")
+        self.rectangles: List[Rectangle] = list(rectangles)
+        # a node is [left, top, right, bottom, children, is_leaf] and a leaf's
+        # children are (left, top, right, bottom, index) entries
+        level: List[Any] = [
+            (rc.left, rc.top, rc.right, rc.bottom, index)
+            for index, rc in enumerate(self.rectangles)
+        ]
+        leaf = True
+        while len(level) > capacity or leaf:
+            level = self._pack(level, capacity, leaf)
+            leaf = False
+        self._root: List[Any] = [
+            min((node[0] for node in level), default=0),
+            min((node[1] for node in level), default=0),
+            max((node[2] for node in level), default=0),
+            max((node[3] for node in level), default=0),
+            level,
+            False,
+        ]
+
+    @staticmethod
+    def _pack(items: List[Any], capacity: int, leaf: bool) -> List[Any]:
+        """Group one level of the tree into the nodes of the level above it."""
+        if not items:
+            return []
+        slices = ceil(sqrt(ceil(len(items) / capacity)))
+        slice_size = slices * capacity
+        items = sorted(items, key=lambda item: item[0] + item[2])
+        nodes = []
+        for start in range(0, len(items), slice_size):
+            column = sorted(items[start : start + slice_size], key=lambda item: item[1] + item[3])
+            for first in range(0, len(column), capacity):
+                children = column[first : first + capacity]
+                nodes.append(
+                    [
+                        min(child[0] for child in children),
+                        min(child[1] for child in children),
+                        max(child[2] for child in children),
+                        max(child[3] for child in children),
+                        children,
+                        leaf,
+                    ]
+                )
+        return nodes
+
+    def __len__(self) -> int:
+        return len(self.rectangles)
+
+    def containing(self, point: Point) -> List[int]:
+        """Return the indices of the rectangles that contain `point`."""
+        x, y = point.x, point.y
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for child in node[4]:
+                if child[0] <= x <= child[2] and child[1] <= y <= child[3]:
+                    if node[5]:
+                        found.append(child[4])
+                    else:
+                        stack.append(child)
+        found.sort()
+        return found
+
+    def overlapping(self, rc: Rectangle) -> List[int]:
+        """Return the indices of the rectangles that overlap `rc`."""
+        left, top, right, bottom = rc.left, rc.top, rc.right, rc.bottom
+        found: List[int] = []
+        if rc.is_empty():
+            return found
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            for child in node[4]:
+                if child[0] < right and left < child[2] and child[1] < bottom and top < child[3]:
+                    if not node[5]:
+                        stack.append(child)
+                    elif child[0] < child[2] and child[1] < child[3]:
+                        found.append(child[4])
+        found.sort()
+        return found
+
+    def overlapping_pairs(self) -> Iterator[Tuple[int, int]]:
+        """Yield every pair of indices ``(i, j)``, with ``i < j``, whose rectangles overlap."""
+        for i, rc in enumerate(self.rectangles):
+            for j in self.overlapping(rc):
+                if j > i:
+                    yield i, j
+
+    def nearest(self, point: Point, k: int = 1) -> List[int]:
+        """Return the indices of the `k` rectangles closest to `point`, nearest first.
+
+        Distances are Manhattan distances to the closest point of a rectangle,
+        zero when the rectangle contains the point; ties go to the lower index.
+        """
+        x, y = point.x, point.y
+        found: List[int] = []
+        counter = count()
+        heap: List[Tuple[int, int, int, Any]] = [(0, -1, next(counter), self._root)]
+        while heap and len(found) < k:
+            _, index, _, item = heappop(heap)
+            if index >= 0:
+                found.append(index)
+                continue
+            for child in item[4]:
+                distance = max(child[0] - x, 0, x - child[2]) + max(child[1] - y, 0, y - child[3])
+                if item[5]:
+                    heappush(heap, (distance, child[4], next(counter), None))
+                else:
+                    heappush(heap, (distance, -1, next(counter), child))
+        return found
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Breadth-first distance fields over 2-D grids, computed with NumPy.
+
+Grids are indexed ``grid[y, x]`` while sources are given as ``(x, y)`` pairs
+to match `aoclib.geometry.Point`.  NumPy is only needed by this module.
+"""
+
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+Sources = Union[np.ndarray, Iterable[Tuple[int, int]]]
+
+UNREACHABLE = -1
+
+_ORTHOGONAL = ((0, 1), (0, -1), (1, 0), (-1, 0))
+_DIAGONAL = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+def char_grid(lines: Iterable[str]) -> np.ndarray:
+    """Turn rows of text into a 2-D array of single characters."""
+    rows: List[List[str]] = [list(line.rstrip("\n")) for line in lines]
+    return np.array(rows, dtype="<U1")
+
+
+def distance_field(
+    passable: np.ndarray,
+    sources: Sources,
+    diagonal: bool = False,
+    max_distance: Optional[int] = None,
+) -> np.ndarray:
+    """Return the number of steps from the nearest source to every cell.
+
+    `passable` is a boolean mask of open cells and `sources` is either a
+    boolean mask of the same shape or ``(x, y)`` pairs, including an integer
+    array of them, and pairs outside the grid are ignored.  Moves are orthogonal, or to all eight neighbours with
+    `diagonal`.  Cells that are walls, cannot be reached or lie beyond
+    `max_distance` are `UNREACHABLE`.
+
+    The flood works a whole frontier at a time: the frontier is an array of
+    flat indices into a grid padded with a wall border, so its neighbours are
+    fixed index offsets and each level costs time proportional to its size.
+    """
+    height, width = passable.shape
+    stride = width + 2
+    padded = np.zeros((height + 2, stride), dtype=bool)
+    padded[1:-1, 1:-1] = passable
+    unvisited = padded.ravel()
+
+    if isinstance(sources, np.ndarray) and sources.dtype == bool:
+        if sources.shape != passable.shape:
+            raise ValueError("a source mask must have the same shape as passable.")
+        ys, xs = np.nonzero(sources)
+    else:
+        pairs = np.array(list(sources), dtype=np.intp).reshape(-1, 2)
+        xs, ys = pairs[:, 0], pairs[:, 1]
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        xs, ys = xs[inside], ys[inside]
+    frontier = np.unique((ys + 1) * stride + xs + 1)
+    frontier = frontier[unvisited[frontier]]
+
+    moves = _ORTHOGONAL + _DIAGONAL if diagonal else _ORTHOGONAL
+    offsets = np.array([dy * stride + dx for dx, dy in moves], dtype=np.intp)
+    distances = np.full(padded.size, UNREACHABLE, dtype=np.int32)
+    # the last write to a cell wins, which drops duplicate neighbours without sorting
+    claims = np.empty(padded.size, dtype=np.intp)
+    distance = 0
+    while frontier.size:
+        unvisited[frontier] = False
+        distances[frontier] = distance
+        if distance == max_distance:
+            break
+        distance += 1
+        neighbours = (frontier[:, np.newaxis] + offsets).ravel()
+        neighbours = neighbours[unvisited[neighbours]]
+        order = np.arange(neighbours.size)
+        claims[neighbours] = order
+        frontier = neighbours[claims[neighbours] == order]
+    return distances.reshape(padded.shape)[1:-1, 1:-1]
@@ -1,8 +1,33 @@
 # -*- coding: utf-8 -*-
 
-from collections import deque
+from __future__ import annotations
+
+import asyncio
+import copy
+import json
+import multiprocessing
+import os
+import time
+from collections import Counter, deque
 from enum import IntEnum
-from typing import Deque, Dict, List, NamedTuple, Optional, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+    overload,
+)
 
 
 class ParameterMode(IntEnum):
@@ -35,39 +60,425 @@ INSTRUCTIONS: Dict[int, InstructionInfo] = {
 }
 
 
+class DecodedInstruction(NamedTuple):
+    """An instruction with its opcode and parameter modes already decoded.
+
+    Each operand is an ``(address, relative, deref)`` triple: the value is read
+    from ``address``, offset by the relative base when ``relative`` is set and
+    then dereferenced when ``deref`` is set.  Write parameters are never
+    dereferenced so they resolve to the destination address.
+    """
+
+    opcode: int
+    size: int
+    operands: Tuple[Tuple[int, bool, bool], ...]
+
+
+Pages = Dict[int, Tuple[int, ...]]
+
+
+class Memory:
+    """The memory of an Intcode VM.
+
+    Addresses below `size` live in a dense list of cells, which is faster to
+    index than ``array("q")`` and never overflows.  Each cell is an 8 byte
+    pointer, plus the int object itself for values outside the small int
+    cache.  Addresses beyond that go to a sparse dict, so a program may write
+    anywhere without allocating everything in between.  `size` must be at
+    least the length of the program.
+
+    `Intcode.tape` used to be a plain list and a Memory still reads like one
+    over the dense cells: len() is `size`, iteration and slices cover the
+    dense cells, while indexing reaches any address.
+
+    Writes through ``memory[address] = value`` call `on_write` with the
+    address afterwards, which lets a VM drop code it decoded from that word.
+
+    Dense writes flag their page in `dirty` and reset() only restores the
+    flagged pages from the original program image.  snapshot() copies only the
+    flagged pages and shares the ones not written since the previous snapshot
+    or restore with it.
+    """
+
+    PAGE_BITS = 8
+    PAGE_SIZE = 1 << PAGE_BITS
+
+    # page flags
+    CLEAN = 0  # holds the program image
+    WRITTEN = 1  # written since the last snapshot or restore
+    SAVED = 2  # identical to the page in `saved`
+
+    def __init__(self, program: List[int], size: Optional[int] = None) -> None:
+        if size is None:
+            # add extra memory space for data buffer
+            size = len(program) + max(1024, len(program) * 3)
+        elif size < len(program):
+            raise ValueError(f"memory size {size} is smaller than the program ({len(program)})")
+        self.image: List[int] = list(program)
+        self.size: int = size
+        self.cells: List[int] = self.image + [0] * (size - len(self.image))
+        self.sparse: Dict[int, int] = {}
+        self.dirty: bytearray = bytearray((size >> Memory.PAGE_BITS) + 1)
+        self.saved: Pages = {}
+        self.on_write: Optional[Callable[[int], None]] = None
+
+    @overload
+    def __getitem__(self, address: int) -> int: ...
+
+    @overload
+    def __getitem__(self, address: slice) -> List[int]: ...
+
+    def __getitem__(self, address: Union[int, slice]) -> Union[int, List[int]]:
+        if isinstance(address, slice):
+            return self.cells[address]
+        return self.read(address)
+
+    def __setitem__(self, address: int, value: int) -> None:
+        self.write(address, value)
+        if self.on_write is not None:
+            self.on_write(address)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.cells)
+
+    def read(self, address: int) -> int:
+        """Return the value stored at `address`."""
+        if address < 0:
+            raise IndexError(f"negative address {address}")
+        if address < self.size:
+            return self.cells[address]
+        return self.sparse.get(address, 0)
+
+    def write(self, address: int, value: int) -> None:
+        """Store `value` at `address`."""
+        if address < 0:
+            raise IndexError(f"negative address {address}")
+        if address < self.size:
+            self.cells[address] = value
+            self.dirty[address >> Memory.PAGE_BITS] = Memory.WRITTEN
+        else:
+            self.sparse[address] = value
+
+    def page_range(self, page: int) -> range:
+        """Return the addresses of the dense cells in `page`."""
+        start = page << Memory.PAGE_BITS
+        return range(start, min(start + Memory.PAGE_SIZE, self.size))
+
+    def dirty_pages(self) -> List[int]:
+        """Return the pages that differ from the program image."""
+        return [page for page, flag in enumerate(self.dirty) if flag]
+
+    def _clean_page(self, page: int) -> None:
+        """Restore `page` from the program image."""
+        addresses = self.page_range(page)
+        original = self.image[addresses.start : addresses.stop]
+        original += [0] * (len(addresses) - len(original))
+        self.cells[addresses.start : addresses.stop] = original
+        self.dirty[page] = Memory.CLEAN
+
+    def reset(self) -> None:
+        """Restore the memory to the original program image."""
+        for page in self.dirty_pages():
+            self._clean_page(page)
+        self.saved = {}
+        self.sparse.clear()
+
+    def snapshot(self) -> Tuple[Pages, Dict[int, int]]:
+        """Return the dense pages and sparse cells that differ from the program image."""
+        pages: Pages = {}
+        for page in self.dirty_pages():
+            if self.dirty[page] == Memory.SAVED:
+                pages[page] = self.saved[page]
+            else:
+                addresses = self.page_range(page)
+                pages[page] = tuple(self.cells[addresses.start : addresses.stop])
+                self.dirty[page] = Memory.SAVED
+        self.saved = pages
+        return pages, dict(self.sparse)
+
+    def fork(self) -> Memory:
+        """Return a copy of this memory sharing its program image and saved pages.
+
+        Only the dense cells are copied, call snapshot() first so the pages
+        written so far are shared with the copy rather than flagged as written.
+        The copy has no `on_write` callback.
+        """
+        memory = copy.copy(self)
+        memory.on_write = None
+        memory.cells = self.cells[:]
+        memory.sparse = dict(self.sparse)
+        memory.dirty = bytearray(self.dirty)
+        return memory
+
+    def restore(self, pages: Pages, sparse: Dict[int, int]) -> None:
+        """Restore the memory to the state returned by snapshot()."""
+        for page in self.dirty_pages():
+            if page not in pages:
+                self._clean_page(page)
+        for page, cells in pages.items():
+            if self.dirty[page] != Memory.SAVED or self.saved[page] is not cells:
+                addresses = self.page_range(page)
+                self.cells[addresses.start : addresses.stop] = cells
+                self.dirty[page] = Memory.SAVED
+        self.saved = pages
+        self.sparse = dict(sparse)
+
+
+# compiled instructions that stop the VM record why in Intcode._stop and
+# return _STOP instead of the next ip, any other negative ip is a bad jump
+_STOP = -1
+_PAUSED = 1
+_HALTED = 2
+
+# how often an instruction is re-specialized after its operands are
+# overwritten before it falls back to reading them from memory
+_RECOMPILE_LIMIT = 4
+
+# closure flavours: specialized closures bind their operand words as
+# constants, generic ones read them from the cells on every call and far ones
+# go through Memory.read()/write() so any address can be reached
+SPECIALIZED = "specialized"
+GENERIC = "generic"
+FAR = "far"
+
+_BINARY_OPERATORS: Dict[int, str] = {
+    1: "{} + {}",
+    2: "{} * {}",
+    7: "1 if {} < {} else 0",
+    8: "1 if {} == {} else 0",
+}
+
+_STORE_TEMPLATE = """\
+        target = {}
+        cells[target] = {}
+        dirty[target >> PAGE_BITS] = WRITTEN
+        if target in watched:
+            vm._invalidate(target)
+        return nxt"""
+
+_FAR_STORE_TEMPLATE = """\
+        target = {}
+        memory.write(target, {})
+        if target in vm._decoded or target in watched:
+            vm._invalidate(target)
+        return nxt"""
+
+FactoryKey = Tuple[int, Tuple[Tuple[bool, bool], ...], str]
+Factory = Callable[..., Callable[[], int]]
+
+_FACTORIES: Dict[FactoryKey, Factory] = {}
+
+
+def _build_factory(opcode: int, modes: Tuple[Tuple[bool, bool], ...], flavour: str) -> Factory:
+    """Generate a function that builds closures for one opcode, mode combination and flavour.
+
+    The factory takes the operands as ``p1``, ``p2`` and ``p3``.  A specialized
+    closure is given the operand words themselves so positional addresses and
+    immediate values are constants, the other flavours are given the addresses
+    of the operand words and read them on every call.
+    """
+    if flavour == FAR:
+        load = "memory.read({})"
+    else:
+        load = "cells[{}]"
+    operands = []
+    for param_num, (relative, deref) in enumerate(modes, 1):
+        expr = f"p{param_num}" if flavour == SPECIALIZED else load.format(f"p{param_num}")
+        if relative:
+            expr = f"vm.relative_base + {expr}"
+        if deref:
+            expr = load.format(expr)
+        operands.append(expr)
+
+    if opcode in _BINARY_OPERATORS:
+        store = _FAR_STORE_TEMPLATE if flavour == FAR else _STORE_TEMPLATE
+        body = store.format(operands[2], _BINARY_OPERATORS[opcode].format(*operands[:2]))
+    elif opcode == 3:
+        # the input is consumed before the store so it must not fail
+        store = _FAR_STORE_TEMPLATE.format(operands[0], "vm._read_input()")
+        body = "        vm.ip = here\n" + store
+    elif opcode == 4:
+        body = f"""\
+        if vm._write_output({operands[0]}):
+            vm.ip = nxt
+            vm._stop = PAUSED
+            return STOP
+        return nxt"""
+    elif opcode == 5:
+        body = f"        return {operands[1]} if {operands[0]} else nxt"
+    elif opcode == 6:
+        body = f"        return nxt if {operands[0]} else {operands[1]}"
+    elif opcode == 9:
+        body = f"        vm.relative_base += {operands[0]}\n        return nxt"
+    else:
+        body = "        vm.ip = here\n        vm._stop = HALTED\n        return STOP"
+
+    source = f"""\
+def factory(vm, cells, memory, dirty, watched, here, nxt, p1=None, p2=None, p3=None):
+    def instruction():
+{body}
+    return instruction
+"""
+    namespace: Dict[str, Any] = {
+        "STOP": _STOP,
+        "PAUSED": _PAUSED,
+        "HALTED": _HALTED,
+        "PAGE_BITS": Memory.PAGE_BITS,
+        "WRITTEN": Memory.WRITTEN,
+    }
+    exec(source, namespace)
+    factory = _FACTORIES[(opcode, modes, flavour)] = namespace["factory"]
+    return factory
+
+
+class Snapshot(NamedTuple):
+    """The state of an Intcode VM saved by Intcode.snapshot()."""
+
+    ip: int
+    relative_base: int
+    pages: Pages
+    sparse: Dict[int, int]
+    inputs: Tuple[int, ...]
+    last_input: Optional[int]
+    last_output: Optional[int]
+    outputs: Tuple[int, ...]
+    halted: bool
+
+
+class _InputNeeded(Exception):
+    """Raised by Intcode._read_input() to stop run() when the inputs are exhausted."""
+
+
+class Profile:
+    """Execution statistics of an Intcode VM.
+
+    Set ``vm.profile = Profile()`` to collect them.  Profiled runs go through
+    their own loop over the compiled instructions whatever the VM's backend,
+    so the regular loops do no bookkeeping at all.  A block entry is counted
+    for the first instruction run and for every instruction after a jump.
+
+    The counts are the same for either backend, but `seconds` and
+    `steps_per_second` time the compiled closures plus the bookkeeping, not
+    the VM's own backend.  To compare backends or check that a VM change pays
+    off, time unprofiled runs instead, as ``make bench`` does.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: float = 0.0
+        self.opcodes: Counter[int] = Counter()
+        self.addresses: Counter[int] = Counter()
+        self.blocks: Counter[int] = Counter()
+
+    @property
+    def steps(self) -> int:
+        return sum(self.opcodes.values())
+
+    @property
+    def inputs(self) -> int:
+        return self.opcodes[3]
+
+    @property
+    def outputs(self) -> int:
+        return self.opcodes[4]
+
+    @property
+    def steps_per_second(self) -> float:
+        """The speed of the profiled loop over the compiled closures."""
+        return self.steps / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            "steps": self.steps,
+            "seconds": self.seconds,
+            "steps_per_second": self.steps_per_second,
+            "inputs": self.inputs,
+            "outputs": self.outputs,
+            "opcodes": {INSTRUCTIONS[op].name: n for op, n in self.opcodes.most_common()},
+            "addresses": dict(self.addresses.most_common()),
+            "blocks": dict(self.blocks.most_common()),
+        }
+
+    def to_json(self) -> str:
+        """Return the statistics as a JSON document."""
+        return json.dumps(self.as_dict(), indent=2)
+
+    def table(self, top: int = 10) -> str:
+        """Return the statistics and the `top` hottest blocks as a text table."""
+        lines = [
+            f"steps      {self.steps:>14,}",
+            f"seconds    {self.seconds:>14.3f}",
+            f"steps/sec  {self.steps_per_second:>14,.0f}",
+            f"inputs     {self.inputs:>14,}",
+            f"outputs    {self.outputs:>14,}",
+            "",
+            "opcode              count",
+        ]
+        for opcode, count in self.opcodes.most_common():
+            lines.append(f"{INSTRUCTIONS[opcode].name:10} {count:>14,}")
+        lines += ["", "block             entries"]
+        for address, count in self.blocks.most_common(top):
+            lines.append(f"{address:>10} {count:>14,}")
+        return "\n".join(lines)
+
+
+class _CompiledCode(dict):
+    """Compiled instructions keyed by address, compiling missing ones on lookup."""
+
+    def __init__(self, vm: "Intcode") -> None:
+        super().__init__()
+        self.vm = vm
+
+    def __missing__(self, address: int) -> Callable[[], int]:
+        return self.vm._compile(address)
+
+
 class Intcode:
-    def __init__(self, program: List[int], chained_mode: bool = False) -> None:
+    BACKENDS = ("interpreter", "compiled")
+
+    def __init__(
+        self,
+        program: List[int],
+        chained_mode: bool = False,
+        backend: str = "interpreter",
+        memory_size: Optional[int] = None,
+    ) -> None:
+        if backend not in Intcode.BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}")
         self.ip: int = 0
-        self.program: List[int] = program[:]
-        self.tape: List[int] = program[:]
-        # add extra memory space for data buffer
-        self.tape += [0] * max(1024, len(self.program) * 3)
+        self.tape: Memory = Memory(program, memory_size)
+        self.tape.on_write = self._written
+        # the program image is never written, so the VM and its memory share it
+        self.program: List[int] = self.tape.image
         self.relative_base: int = 0
         self.last_output: Optional[int] = None
         self.last_input: Optional[int] = None
         self.chained_mode: bool = chained_mode
         self.silent_mode: bool = False
         self.inputs: Deque = deque()
+        # outputs collected by run(), see take_outputs()
+        self.outputs: List[int] = []
+        self.halted: bool = False
+        # instructions executed since the last reset
+        self.steps: int = 0
+        self.profile: Optional[Profile] = None
+        self.backend: str = backend
+        self._running: bool = False
+        # decoded instructions keyed by address, see _decode()
+        self._decoded: Dict[int, DecodedInstruction] = {}
+        # compiled instructions and the addresses of the instructions
+        # compiled from each memory word, see _compile()
+        self._code: _CompiledCode = _CompiledCode(self)
+        self._far_code: Dict[int, Callable[[], int]] = {}
+        self._watched: Dict[int, Set[int]] = {}
+        self._recompiles: Dict[int, int] = {}
+        # why compiled code last returned _STOP, see _stopped()
+        self._stop: Optional[int] = None
 
     def _disasm(self) -> str:
-        addr = f"{self.ip:5}"
-        opcode = self.tape[self.ip] % 100
-        opname = INSTRUCTIONS[opcode].name
-        params = []
-        mask = 10
-        for pnum, ptype in enumerate(INSTRUCTIONS[opcode].params, 1):
-            mask *= 10
-            pmode = ParameterMode((self.tape[self.ip] // mask) % 10)
-            if ptype == ParameterType.WRITE:
-                leader = "$"
-            elif pmode == ParameterMode.POSITIONAL:
-                leader = "$"
-            elif pmode == ParameterMode.RELATIVE:
-                leader = "@"
-            else:
-                leader = ""
-            params.append(f"{leader}{self.tape[self.ip + pnum]}")
-        return addr + ": " + f"{opname} " + ", ".join(params)
+        return str(decode_at(self.tape, self.ip))
 
     def add_inputs(self, inputs: List[int]) -> None:
         """Add inputs for the VM to read."""
@@ -99,62 +510,772 @@ class Intcode:
                 raise TypeError(f"unknown parameter mode {param_mode}")
         return (opcode, arguments)
 
+    def _decode(self, address: int) -> DecodedInstruction:
+        """Decode the instruction at `address` and remember it for later steps."""
+        instruction = self.tape[address]
+        opcode = instruction % 100
+        operands = []
+        mask = 10
+        for param_num, param_type in enumerate(INSTRUCTIONS[opcode].params, 1):
+            mask *= 10
+            param_mode = ParameterMode((instruction // mask) % 10)
+            relative = param_mode == ParameterMode.RELATIVE
+            deref = param_type == ParameterType.READ and param_mode != ParameterMode.IMMEDIATE
+            operands.append((address + param_num, relative, deref))
+        decoded = DecodedInstruction(opcode, 1 + len(operands), tuple(operands))
+        self._decoded[address] = decoded
+        return decoded
+
+    def _build(self, address: int, flavour: str) -> Callable[[], int]:
+        """Translate the instruction at `address` into a closure returning the next ip."""
+        opcode, size, operands = self._decoded.get(address) or self._decode(address)
+        key = (opcode, tuple((relative, deref) for _, relative, deref in operands), flavour)
+        factory = _FACTORIES.get(key) or _build_factory(*key)
+        if flavour == SPECIALIZED:
+            words = range(address, address + size)
+            args = [self.tape[operand] for operand, _, _ in operands]
+        else:
+            words = range(address, address + 1)
+            args = [operand for operand, _, _ in operands]
+        for word in words:
+            self._watched.setdefault(word, set()).add(address)
+        memory = self.tape
+        return factory(
+            self, memory.cells, memory, memory.dirty, self._watched, address, address + size, *args
+        )
+
+    def _compile(self, address: int) -> Callable[[], int]:
+        """Compile the instruction at `address` for the compiled backend."""
+        if address >= len(self.program):
+            self.ip = address
+            raise EOFError("reached end of tape without finding halt instruction.")
+        if self._recompiles.get(address, 0) < _RECOMPILE_LIMIT:
+            instruction = self._build(address, SPECIALIZED)
+        else:
+            instruction = self._build(address, GENERIC)
+        self._code[address] = instruction
+        return instruction
+
+    def _far_step(self, address: int, error: IndexError) -> int:
+        """Execute the instruction at `address` with every memory access bounds checked.
+
+        Both backends index the dense cells directly and fall back to this when
+        an access raises IndexError, which leaves the instruction undone.  The
+        exception is re-raised when it came from an exhausted input queue.
+        """
+        if (self._decoded.get(address) or self._decode(address)).opcode == 3:
+            raise error
+        instruction = self._far_code.get(address)
+        if instruction is None:
+            instruction = self._far_code[address] = self._build(address, FAR)
+        return instruction()
+
+    def _invalidate(self, address: int, modified: bool = True) -> None:
+        """Forget decoded and compiled instructions that read the word at `address`."""
+        self._decoded.pop(address, None)
+        for start in self._watched.pop(address, ()):
+            self._far_code.pop(start, None)
+            if self._code.pop(start, None) is not None and modified:
+                self._recompiles[start] = self._recompiles.get(start, 0) + 1
+
     def execute(self) -> Union[Optional[int], bool]:
         """Execute the instructions contained in the VM memory."""
-        while self.ip < len(self.program):
-            opcode, params = self.decode_instruction()
-            if opcode == 1:
-                self.tape[params[2]] = params[0] + params[1]
-                self.ip += 1 + len(params)
-            elif opcode == 2:
-                self.tape[params[2]] = params[0] * params[1]
-                self.ip += 1 + len(params)
-            elif opcode == 3:
-                if self.chained_mode or self.inputs:
-                    value = self.inputs.popleft()
-                else:
-                    value = int(input("$ "))
-                self.last_input = self.tape[params[0]] = value
-                self.ip += 1 + len(params)
-            elif opcode == 4:
-                self.last_output = params[0]
-                self.ip += 1 + len(params)
-                if self.chained_mode:
-                    return True
-                elif not self.silent_mode:
-                    print(self.last_output)
-            elif opcode == 5:
-                self.ip = params[1] if params[0] else self.ip + 1 + len(params)
-            elif opcode == 6:
-                self.ip = params[1] if not params[0] else self.ip + 1 + len(params)
-            elif opcode == 7:
-                self.tape[params[2]] = 1 if params[0] < params[1] else 0
-                self.ip += 1 + len(params)
-            elif opcode == 8:
-                self.tape[params[2]] = 1 if params[0] == params[1] else 0
-                self.ip += 1 + len(params)
-            elif opcode == 9:
-                self.relative_base += params[0]
-                self.ip += 1 + len(params)
-            elif opcode == 99:
-                if self.chained_mode:
-                    return False
-                else:
-                    return self.last_output
-        raise EOFError("reached end of tape without finding halt instruction.")
+        if self.profile is not None:
+            return self._execute_profiled(self.profile)
+        if self.backend == "compiled":
+            return self._execute_compiled()
+        memory = self.tape
+        cells = memory.cells
+        dirty = memory.dirty
+        decoded = self._decoded
+        watched = self._watched
+        program_size = len(self.program)
+        ip = self.ip
+        steps = 0
+        try:
+            while ip < program_size:
+                steps += 1
+                try:
+                    try:
+                        opcode, size, operands = decoded[ip]
+                    except KeyError:
+                        opcode, size, operands = self._decode(ip)
+                    params = []
+                    for address, relative, deref in operands:
+                        value = cells[address]
+                        if relative:
+                            value += self.relative_base
+                        if deref:
+                            value = cells[value]
+                        params.append(value)
+                    if opcode == 1:
+                        value = params[0] + params[1]
+                    elif opcode == 2:
+                        value = params[0] * params[1]
+                    elif opcode == 7:
+                        value = 1 if params[0] < params[1] else 0
+                    elif opcode == 8:
+                        value = 1 if params[0] == params[1] else 0
+                    elif opcode == 5:
+                        ip = params[1] if params[0] else ip + size
+                        continue
+                    elif opcode == 6:
+                        ip = ip + size if params[0] else params[1]
+                        continue
+                    elif opcode == 9:
+                        self.relative_base += params[0]
+                        ip += size
+                        continue
+                    elif opcode == 3:
+                        self.ip = ip
+                        self._store(params[0], self._read_input())
+                        ip += size
+                        continue
+                    elif opcode == 4:
+                        ip += size
+                        if self._write_output(params[0]):
+                            self.ip = ip
+                            return True
+                        continue
+                    else:
+                        self.ip = ip
+                        self.halted = True
+                        if self.chained_mode:
+                            return False
+                        else:
+                            return self.last_output
+                    target = params[2]
+                    cells[target] = value
+                    dirty[target >> Memory.PAGE_BITS] = Memory.WRITTEN
+                    if target in decoded or target in watched:
+                        self._invalidate(target)
+                    ip += size
+                except IndexError as error:
+                    ip = self._far_step(ip, error)
+                    if ip < 0:
+                        return self._stopped(ip)
+            self.ip = ip
+            raise EOFError("reached end of tape without finding halt instruction.")
+        finally:
+            self.steps += steps
+
+    def _execute_compiled(self) -> Union[Optional[int], bool]:
+        """Run compiled instructions until the VM pauses on output or halts."""
+        code = self._code
+        ip = self.ip
+        steps = 0
+        try:
+            while True:
+                try:
+                    while ip >= 0:
+                        steps += 1
+                        ip = code[ip]()
+                    break
+                except IndexError as error:
+                    ip = self._far_step(ip, error)
+        finally:
+            self.steps += steps
+        return self._stopped(ip)
+
+    def _execute_profiled(self, profile: Profile) -> Union[Optional[int], bool]:
+        """Run compiled instructions like _execute_compiled(), recording a profile."""
+        code = self._code
+        ip = self.ip
+        steps = 0
+        jumped = True
+        start = time.perf_counter()
+        try:
+            while ip >= 0:
+                here = ip
+                # compiling first raises EOFError past the end of the program
+                instruction = code[here]
+                opcode = (self._decoded.get(here) or self._decode(here)).opcode
+                steps += 1
+                try:
+                    ip = instruction()
+                except IndexError as error:
+                    ip = self._far_step(here, error)
+                profile.opcodes[opcode] += 1
+                profile.addresses[here] += 1
+                if jumped:
+                    profile.blocks[here] += 1
+                jumped = opcode == 5 or opcode == 6
+        finally:
+            self.steps += steps
+            profile.seconds += time.perf_counter() - start
+        return self._stopped(ip)
+
+    def _stopped(self, ip: int) -> Union[Optional[int], bool]:
+        """Return what execute() returns once compiled code stops with `ip`.
+
+        A negative `ip` that no stopping instruction returned is a jump to a
+        negative address, which raises IndexError as it does in the interpreter.
+        """
+        stop, self._stop = self._stop, None
+        if stop is None:
+            raise IndexError(f"negative address {ip}")
+        if stop == _PAUSED:
+            return True
+        self.halted = True
+        return False if self.chained_mode else self.last_output
+
+    def run(self) -> bool:
+        """Run until the VM halts or needs an input it has not been given.
+
+        Instead of pausing or printing, outputs are collected in `outputs`.
+        Returns True if the VM halted and False if it is waiting for input.
+        """
+        self._running = True
+        try:
+            self.execute()
+        except _InputNeeded:
+            # the instruction waiting for input has not run
+            self.steps -= 1
+            return False
+        finally:
+            self._running = False
+        return True
+
+    def take_outputs(self) -> List[int]:
+        """Return and clear the outputs collected by run()."""
+        outputs, self.outputs = self.outputs, []
+        return outputs
+
+    def interact(self) -> Generator[List[int], Optional[Iterable[int]], List[int]]:
+        """Drive the VM as a generator.
+
+        Every time the VM needs input the generator yields the outputs since
+        the previous yield and adds any values sent to it to the inputs.  It
+        returns the remaining outputs once the VM halts.
+        """
+        while not self.run():
+            inputs = yield self.take_outputs()
+            if inputs is not None:
+                self.inputs.extend(inputs)
+        return self.take_outputs()
+
+    async def run_async(self, in_queue: asyncio.Queue, out_queue: asyncio.Queue) -> None:
+        """Run the VM as a task reading inputs from `in_queue` and writing outputs to `out_queue`.
+
+        The VM runs without yielding to the event loop until it needs input, so
+        many VMs can share one loop.  Returns when the VM halts.
+        """
+        while not self.run():
+            for value in self.take_outputs():
+                out_queue.put_nowait(value)
+            self.inputs.append(await in_queue.get())
+            while not in_queue.empty():
+                self.inputs.append(in_queue.get_nowait())
+        for value in self.take_outputs():
+            out_queue.put_nowait(value)
+
+    def _read_input(self) -> int:
+        """Return the next input value."""
+        if self._running and not self.inputs:
+            raise _InputNeeded()
+        if self.chained_mode or self.inputs:
+            value = self.inputs.popleft()
+        else:
+            value = int(input("$ "))
+        self.last_input = value
+        return value
+
+    def _write_output(self, value: int) -> bool:
+        """Record an output value, returning True if execution should pause."""
+        self.last_output = value
+        if self._running:
+            self.outputs.append(value)
+            return False
+        if self.chained_mode:
+            return True
+        if not self.silent_mode:
+            print(value)
+        return False
+
+    def _store(self, address: int, value: int) -> None:
+        """Write `value` to memory, dropping any stale code read from that address."""
+        self.tape.write(address, value)
+        self._written(address)
+
+    def _written(self, address: int) -> None:
+        """Drop any code read from `address` after it was written."""
+        if address in self._decoded or address in self._watched:
+            self._invalidate(address)
+
+    def _code_words(self, pages: Iterable[int]) -> Dict[int, int]:
+        """Return the value of every word in `pages` that decoded or compiled code read."""
+        memory = self.tape
+        # instructions start inside the program, their operands may run 3 words past it
+        code_end = len(self.program) + 3
+        words = {}
+        for page in pages:
+            addresses = memory.page_range(page)
+            for address in range(addresses.start, min(addresses.stop, code_end)):
+                if address in self._decoded or address in self._watched:
+                    words[address] = memory.cells[address]
+        return words
+
+    def _invalidate_changed(self, words: Dict[int, int]) -> None:
+        """Forget the code read from words that no longer hold the given values."""
+        cells = self.tape.cells
+        for address, value in words.items():
+            if cells[address] != value:
+                self._invalidate(address, modified=False)
 
     def reset(self) -> None:
         """Reset the VM state before starting a new execution."""
-        self.tape = self.program[:]
-        # add extra memory space for data buffer
-        self.tape += [0] * max(1024, len(self.program) * 3)
+        words = self._code_words(self.tape.dirty_pages())
+        self.tape.reset()
+        self._invalidate_changed(words)
         self.ip = 0
         self.relative_base = 0
+        self.last_output = None
+        self.last_input = None
+        self.inputs.clear()
+        self.outputs = []
+        self.halted = False
+        self.steps = 0
+
+    def snapshot(self) -> Snapshot:
+        """Save the VM state so it can be restored later.
+
+        Only memory pages that differ from the program are copied, and pages
+        not written since the previous snapshot() or restore() are shared with
+        that snapshot.
+        """
+        pages, sparse = self.tape.snapshot()
+        return Snapshot(
+            self.ip,
+            self.relative_base,
+            pages,
+            sparse,
+            tuple(self.inputs),
+            self.last_input,
+            self.last_output,
+            tuple(self.outputs),
+            self.halted,
+        )
+
+    def restore(self, snapshot: Snapshot) -> None:
+        """Return the VM to the state saved by snapshot()."""
+        words = self._code_words(set(self.tape.dirty_pages()) | snapshot.pages.keys())
+        self.tape.restore(snapshot.pages, snapshot.sparse)
+        self._invalidate_changed(words)
+        self.ip = snapshot.ip
+        self.relative_base = snapshot.relative_base
+        self.inputs = deque(snapshot.inputs)
+        self.last_input = snapshot.last_input
+        self.last_output = snapshot.last_output
+        self.outputs = list(snapshot.outputs)
+        self.halted = snapshot.halted
+
+    def fork(self) -> Intcode:
+        """Return a new VM in the same state as this one.
+
+        The new VM shares the program image and the snapshot pages with this
+        one but needs its own copy of the dense cells.  To backtrack within one
+        VM, snapshot() and restore() are cheaper as they only copy dirty pages.
+        """
+        snapshot = self.snapshot()
+        # start from an empty VM so the program is not copied
+        vm = Intcode([], self.chained_mode, self.backend, memory_size=0)
+        vm.program = self.program
+        vm.tape = self.tape.fork()
+        vm.tape.on_write = vm._written
+        vm.silent_mode = self.silent_mode
+        vm.restore(snapshot)
+        vm._decoded.update(self._decoded)
+        return vm
 
     def set_noun_and_verb(self, noun: int, verb: int) -> None:
         """Set the noun and verb to initialize the program."""
-        self.tape[1] = noun
-        self.tape[2] = verb
+        self._store(1, noun)
+        self._store(2, verb)
+
+
+Packet = Tuple[int, ...]
+Route = Callable[[int, Packet], Tuple[int, Packet]]
+
+
+def route_by_address(source: int, packet: Packet) -> Tuple[int, Packet]:
+    """Send a packet to the VM numbered by its first value."""
+    return packet[0], packet[1:]
+
+
+class Network:
+    """A group of Intcode VMs that send each other packets.
+
+    Every round each VM runs until it blocks on input.  Its outputs are split
+    into packets of `packet_size` values and `route` maps the number of the
+    sending VM and the packet to a destination VM and the values to give it.
+    Packets for a destination outside the network are kept in `undelivered`.
+
+    A VM blocked with no pending input is given `idle_input` if that is set
+    and skipped otherwise.  When `idle_rounds` rounds in a row pass without
+    any VM sending anything or receiving real input the network is idle.
+    """
+
+    def __init__(
+        self,
+        vms: Iterable[Intcode],
+        packet_size: int = 3,
+        route: Route = route_by_address,
+        idle_input: Optional[int] = None,
+        idle_rounds: int = 2,
+    ) -> None:
+        self.vms: List[Intcode] = list(vms)
+        self.packet_size: int = packet_size
+        self.route: Route = route
+        self.idle_input: Optional[int] = idle_input
+        self.idle_rounds: int = idle_rounds
+        self.undelivered: Deque[Tuple[int, Packet]] = deque()
+        self.rounds: int = 0
+        self._blocked: List[bool] = [False] * len(self.vms)
+        self._partial: List[List[int]] = [[] for _ in self.vms]
+
+    @classmethod
+    def chain(cls, vms: Iterable[Intcode], feedback: bool = False) -> Network:
+        """Connect each VM's output to the input of the next one.
+
+        With `feedback` the last VM feeds the first, otherwise its outputs are
+        left in `undelivered`.
+        """
+        vms = list(vms)
+
+        def route(source: int, packet: Packet) -> Tuple[int, Packet]:
+            destination = source + 1
+            if feedback:
+                destination %= len(vms)
+            return destination, packet
+
+        return cls(vms, packet_size=1, route=route)
+
+    def send(self, destination: int, values: Iterable[int]) -> None:
+        """Add `values` to the inputs of the VM numbered `destination`."""
+        if 0 <= destination < len(self.vms):
+            self.vms[destination].inputs.extend(values)
+        else:
+            self.undelivered.append((destination, tuple(values)))
+
+    def run_round(self) -> bool:
+        """Run every VM that is not halted until it blocks.
+
+        Returns False if no VM had input to process or sent any output.
+        """
+        active = False
+        for source, vm in enumerate(self.vms):
+            if vm.halted:
+                continue
+            if self._blocked[source] and not vm.inputs:
+                if self.idle_input is None:
+                    continue
+                vm.inputs.append(self.idle_input)
+            else:
+                active = True
+            self._blocked[source] = not vm.run()
+            outputs = vm.take_outputs()
+            if not outputs:
+                continue
+            active = True
+            partial = self._partial[source]
+            partial.extend(outputs)
+            whole = len(partial) - len(partial) % self.packet_size
+            for start in range(0, whole, self.packet_size):
+                packet = tuple(partial[start : start + self.packet_size])
+                destination, values = self.route(source, packet)
+                self.send(destination, values)
+            del partial[:whole]
+        self.rounds += 1
+        return active
+
+    def run(self, on_idle: Optional[Callable[[Network], bool]] = None) -> bool:
+        """Run rounds until every VM halts or the network stays idle.
+
+        When the network is idle `on_idle` is called with it, typically to
+        send a packet like a NAT would, and the network keeps running if it
+        returns True.  Returns True if all VMs halted.
+        """
+        idle = 0
+        while not all(vm.halted for vm in self.vms):
+            if self.run_round():
+                idle = 0
+                continue
+            idle += 1
+            if self.idle_input is not None and idle < self.idle_rounds:
+                continue
+            if on_idle is None or not on_idle(self):
+                return False
+            idle = 0
+        return True
+
+    def steps(self) -> List[int]:
+        """Return the number of instructions each VM has executed."""
+        return [vm.steps for vm in self.vms]
+
+
+P = TypeVar("P")
+R = TypeVar("R")
+
+# the VM and evaluation function of a sweep worker process, see sweep()
+_sweep_vm: Optional[Intcode] = None
+_sweep_evaluate: Optional[Callable] = None
+
+
+def _sweep_init(program: List[int], backend: str, evaluate: Callable) -> None:
+    global _sweep_vm, _sweep_evaluate
+    _sweep_vm = Intcode(program, backend=backend)
+    _sweep_vm.silent_mode = True
+    _sweep_evaluate = evaluate
+
+
+def _sweep_task(params: P) -> Tuple[P, R]:
+    assert _sweep_vm is not None and _sweep_evaluate is not None, "_sweep_init() was not called"
+    _sweep_vm.reset()
+    return params, _sweep_evaluate(_sweep_vm, params)
+
+
+def sweep(
+    program: List[int],
+    param_space: Iterable[P],
+    evaluate: Callable[[Intcode, P], R],
+    workers: Optional[int] = None,
+    until: Optional[Callable[[R], bool]] = None,
+    backend: str = "interpreter",
+    chunksize: int = 64,
+) -> Iterator[Tuple[P, R]]:
+    """Evaluate `program` for every set of parameters in `param_space`.
+
+    Each worker process builds one VM from the program and calls
+    ``evaluate(vm, params)`` on it after a reset() for every set of parameters
+    it is given, so `evaluate` must be picklable.  The ``(params, result)``
+    pairs are yielded in the order they finish.  The sweep stops after the
+    first result for which `until` returns True, or when the caller stops
+    iterating.  With ``workers=1`` everything runs in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    results: Iterator[Tuple[P, R]]
+    if workers == 1:
+        _sweep_init(program, backend, evaluate)
+        results = map(_sweep_task, param_space)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers, _sweep_init, (program, backend, evaluate))
+        results = pool.imap_unordered(_sweep_task, param_space, chunksize)
+    try:
+        for params, result in results:
+            yield params, result
+            if until is not None and until(result):
+                break
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
+class Instruction(NamedTuple):
+    """An instruction decoded by decode_at()."""
+
+    address: int
+    opcode: int
+    modes: Tuple[ParameterMode, ...]
+    operands: Tuple[int, ...]
+
+    @property
+    def name(self) -> str:
+        return INSTRUCTIONS[self.opcode].name
+
+    @property
+    def size(self) -> int:
+        return 1 + len(self.operands)
+
+    @property
+    def next_address(self) -> int:
+        return self.address + self.size
+
+    def is_jump(self) -> bool:
+        return self.opcode == 5 or self.opcode == 6
+
+    def jump_target(self) -> Optional[int]:
+        """Return the target of a jump if it is an immediate value."""
+        if self.is_jump() and self.modes[1] == ParameterMode.IMMEDIATE:
+            return self.operands[1]
+        return None
+
+    def falls_through(self) -> bool:
+        """Return True if execution can continue with the next instruction."""
+        if self.opcode == 99:
+            return False
+        if self.is_jump() and self.modes[0] == ParameterMode.IMMEDIATE:
+            # a constant condition either always or never jumps
+            return bool(self.operands[0]) == (self.opcode == 6)
+        return True
+
+    def jumps(self) -> bool:
+        """Return True if the instruction can jump."""
+        if not self.is_jump():
+            return False
+        if self.modes[0] == ParameterMode.IMMEDIATE:
+            return bool(self.operands[0]) == (self.opcode == 5)
+        return True
+
+    def __str__(self) -> str:
+        params = []
+        for ptype, pmode, operand in zip(
+            INSTRUCTIONS[self.opcode].params, self.modes, self.operands
+        ):
+            if ptype == ParameterType.WRITE and pmode != ParameterMode.RELATIVE:
+                leader = "$"
+            elif pmode == ParameterMode.POSITIONAL:
+                leader = "$"
+            elif pmode == ParameterMode.RELATIVE:
+                leader = "@"
+            else:
+                leader = ""
+            params.append(f"{leader}{operand}")
+        return f"{self.address:5}: {self.name} {', '.join(params)}".rstrip()
+
+
+def decode_at(memory: Union[Sequence[int], Memory], address: int) -> Instruction:
+    """Decode the instruction at `address` of `memory`.
+
+    Raises ValueError if the word there is not a valid instruction.
+    """
+    instruction = memory[address]
+    opcode = instruction % 100
+    if opcode not in INSTRUCTIONS or instruction < 0:
+        raise ValueError(f"invalid opcode {instruction} at address {address}")
+    modes = []
+    mask = 10
+    for _ in INSTRUCTIONS[opcode].params:
+        mask *= 10
+        modes.append(ParameterMode((instruction // mask) % 10))
+    operands = tuple(memory[address + offset] for offset in range(1, len(modes) + 1))
+    return Instruction(address, opcode, tuple(modes), operands)
+
+
+class BasicBlock:
+    """A run of instructions that is only entered at the top and left at the bottom.
+
+    `successors` holds the start addresses of the blocks control can continue
+    with.  `indirect` is set when the block ends with a jump to an address
+    read from memory, whose targets are unknown.
+    """
+
+    def __init__(self, instructions: List[Instruction]) -> None:
+        self.instructions: List[Instruction] = instructions
+        self.successors: List[int] = []
+        self.indirect: bool = False
+
+    @property
+    def start(self) -> int:
+        return self.instructions[0].address
+
+    @property
+    def end(self) -> int:
+        return self.instructions[-1].next_address
+
+    def __str__(self) -> str:
+        return "\n".join(str(instruction) for instruction in self.instructions)
+
+
+class ControlFlowGraph:
+    """The basic blocks of a program found by disassemble().
+
+    Addresses of the program that were not reached as code are listed in
+    `data`.  Code only reached through indirect jumps, such as the return
+    address of a call, ends up there too.
+    """
+
+    def __init__(self, program: Sequence[int], blocks: Dict[int, BasicBlock]) -> None:
+        self.blocks: Dict[int, BasicBlock] = blocks
+        covered: Set[int] = set()
+        for block in blocks.values():
+            covered.update(range(block.start, block.end))
+        self.data: List[int] = [
+            address for address in range(len(program)) if address not in covered
+        ]
+
+    def instructions(self) -> List[Instruction]:
+        """Return every instruction in address order."""
+        return [
+            instruction
+            for start in sorted(self.blocks)
+            for instruction in self.blocks[start].instructions
+        ]
+
+    def predecessors(self) -> Dict[int, List[int]]:
+        """Return the start addresses of the blocks leading to each block."""
+        result: Dict[int, List[int]] = {start: [] for start in self.blocks}
+        for start, block in self.blocks.items():
+            for successor in block.successors:
+                result[successor].append(start)
+        return result
+
+    def back_edges(self) -> List[Tuple[int, int]]:
+        """Return the (from, to) block pairs of jumps backwards, which close loops."""
+        return [
+            (start, successor)
+            for start, block in sorted(self.blocks.items())
+            for successor in block.successors
+            if successor <= start
+        ]
+
+    def __str__(self) -> str:
+        return "\n\n".join(str(self.blocks[start]) for start in sorted(self.blocks))
+
+
+def disassemble(program: Sequence[int], entry: int = 0) -> ControlFlowGraph:
+    """Find the code reachable from `entry` and split it into basic blocks.
+
+    Control is followed through fall-through and jumps to immediate
+    addresses.  Words that do not decode to a valid instruction end the path
+    that reached them.
+    """
+    code: Dict[int, Instruction] = {}
+    leaders: Set[int] = {entry}
+    pending = [entry]
+    while pending:
+        address = pending.pop()
+        if address in code or not 0 <= address < len(program):
+            continue
+        try:
+            instruction = decode_at(program, address)
+        except (IndexError, ValueError):
+            continue
+        code[address] = instruction
+        if instruction.jumps():
+            target = instruction.jump_target()
+            if target is not None:
+                leaders.add(target)
+                pending.append(target)
+        if instruction.falls_through():
+            if instruction.is_jump():
+                leaders.add(instruction.next_address)
+            pending.append(instruction.next_address)
+
+    blocks: Dict[int, BasicBlock] = {}
+    current: Optional[BasicBlock] = None
+    for address in sorted(code):
+        instruction = code[address]
+        if current is None or address in leaders or current.end != address:
+            current = blocks[address] = BasicBlock([instruction])
+        else:
+            current.instructions.append(instruction)
+        if instruction.is_jump() or instruction.opcode == 99:
+            current = None
+
+    for block in blocks.values():
+        last = block.instructions[-1]
+        if last.jumps():
+            target = last.jump_target()
+            if target is None:
+                block.indirect = True
+            elif target in blocks:
+                block.successors.append(target)
+        if last.falls_through() and last.next_address in blocks:
+            block.successors.append(last.next_address)
+    return ControlFlowGraph(program, blocks)
 
 
 if __name__ == "__main__":
@@ -168,7 +1289,11 @@ if __name__ == "__main__":
             program += list(map(int, line.strip().split(",")))
     try:
         vm = Intcode(program)
+        if "--profile" in sys.argv[2:]:
+            vm.profile = Profile()
         vm.execute()
+        if vm.profile is not None:
+            print(vm.profile.table(), file=sys.stderr)
     except Exception:
         traceback.print_exc()
         pdb.post_mortem()
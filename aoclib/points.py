@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""Bulk operations over many points at once, computed with NumPy.
+
+NumPy is only needed by this module.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Tuple, Union
+
+import numpy as np
+
+from aoclib.geometry import FrozenPoint, Point, Rectangle
+
+PointLike = Union[Point, Tuple[int, int]]
+
+
+def _xy(point: PointLike) -> Tuple[int, int]:
+    return (point.x, point.y) if isinstance(point, Point) else (point[0], point[1])
+
+
+class PointArray:
+    """A sequence of points stored as two columns of 64-bit integers.
+
+    Operations work on whole columns instead of dispatching per `Point`, and
+    each point takes 16 bytes.  Points can be given as `Point`, `FrozenPoint`
+    or ``(x, y)`` tuples; single points are returned as `FrozenPoint`, while
+    slices and boolean masks return a new `PointArray`.
+
+    Attributes
+    ----------
+    xs : numpy.ndarray
+        The x-coordinates.
+    ys : numpy.ndarray
+        The y-coordinates.
+    """
+
+    __slots__ = ("xs", "ys")
+
+    def __init__(self, points: Iterable[PointLike] = ()) -> None:
+        pairs = np.array([_xy(point) for point in points], dtype=np.int64).reshape(-1, 2)
+        self.xs: np.ndarray = pairs[:, 0].copy()
+        self.ys: np.ndarray = pairs[:, 1].copy()
+
+    @classmethod
+    def from_columns(cls, xs: Iterable[int], ys: Iterable[int]) -> PointArray:
+        """Make an array from separate x- and y-coordinates."""
+        points = cls()
+        points.xs = np.array(xs, dtype=np.int64)
+        points.ys = np.array(ys, dtype=np.int64)
+        if points.xs.shape != points.ys.shape or points.xs.ndim != 1:
+            raise ValueError("xs and ys must be flat and have the same length.")
+        return points
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return FrozenPoint(int(self.xs[index]), int(self.ys[index]))
+        return PointArray.from_columns(self.xs[index], self.ys[index])
+
+    def __iter__(self) -> Iterator[FrozenPoint]:
+        return map(FrozenPoint._make, zip(self.xs.tolist(), self.ys.tolist()))
+
+    def __contains__(self, point: PointLike) -> bool:
+        x, y = _xy(point)
+        return bool(np.any((self.xs == x) & (self.ys == y)))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PointArray):
+            return NotImplemented
+        return np.array_equal(self.xs, other.xs) and np.array_equal(self.ys, other.ys)
+
+    def __repr__(self) -> str:
+        return f"PointArray({list(zip(self.xs.tolist(), self.ys.tolist()))})"
+
+    def translate(self, x_offset: int, y_offset: int) -> None:
+        """Offset every point by the given values."""
+        self.xs += x_offset
+        self.ys += y_offset
+
+    def manhattan_distances(self, point: PointLike) -> np.ndarray:
+        """Return the Manhattan distance from every point to `point`."""
+        x, y = _xy(point)
+        return np.abs(self.xs - x) + np.abs(self.ys - y)
+
+    def pairwise_manhattan_distances(self) -> np.ndarray:
+        """Return the matrix of Manhattan distances between every pair of points."""
+        return np.abs(self.xs[:, np.newaxis] - self.xs) + np.abs(self.ys[:, np.newaxis] - self.ys)
+
+    def bounding_box(self) -> Rectangle:
+        """Return the smallest rectangle that contains every point, edges included."""
+        if not len(self.xs):
+            return Rectangle()
+        return Rectangle(
+            int(self.xs.min()), int(self.ys.min()), int(self.xs.max()), int(self.ys.max())
+        )
+
+    def unique(self) -> PointArray:
+        """Return the distinct points in the order they first appear."""
+        # a stable sort keeps the earliest copy of each point at the start of its run
+        order = np.lexsort((self.ys, self.xs))
+        xs, ys = self.xs[order], self.ys[order]
+        starts = np.ones(len(order), dtype=bool)
+        starts[1:] = (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1])
+        return self[np.sort(order[starts])]
@@ -6,17 +6,31 @@ from typing import (
     Generic,
     List,
     Callable,
+    Iterator,
     Set,
     Deque,
     Dict,
     Any,
     Optional,
+    Tuple,
+    cast,
 )
 from typing_extensions import Protocol
-from heapq import heappush, heappop
+from aoclib.edge import Edge
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from heapq import heappush, heappop, nsmallest
+from itertools import count
+from math import inf
+from time import perf_counter
+import multiprocessing
+import os
+import sys
 
 
 T = TypeVar("T")
+T_contra = TypeVar("T_contra", contravariant=True)
 
 
 def linear_contains(iterable: Iterable[T], key: T) -> bool:
@@ -79,6 +93,8 @@ class Stack(Generic[T]):
 
 
 class Node(Generic[T]):
+    __slots__ = ("state", "parent", "cost", "heuristic")
+
     def __init__(
         self, state: T, parent: Optional[Node], cost: float = 0.0, heuristic: float = 0.0
     ) -> None:
@@ -91,23 +107,288 @@ class Node(Generic[T]):
         return (self.cost + self.heuristic) < (other.cost + other.heuristic)
 
 
+Progress = Callable[["SearchStats"], None]
+
+
+@dataclass
+class SearchStats:
+    """Counters filled in by a search that is given one.
+
+    Attributes
+
+    expanded: the number of states whose successors were generated.
+    frontier: the size of the frontier at the last update.
+    peak_frontier: the largest the frontier grew, for `ida_star` the deepest path.
+    explored: the number of distinct states discovered.
+    reopened: how often `astar` expanded a state again after finding a cheaper path to it.
+    peak_memory: an estimate of the bytes held by the search's own containers,
+        not counting the states themselves.
+    elapsed: the seconds since the search started.
+    """
+
+    expanded: int = 0
+    frontier: int = 0
+    peak_frontier: int = 0
+    explored: int = 0
+    reopened: int = 0
+    peak_memory: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.expanded / self.elapsed if self.elapsed > 0 else 0.0
+
+
+# a frontier entry of astar: the tuple, its two floats and the counter
+_HEAP_ENTRY_BYTES = sys.getsizeof((0.0, 0.0, 0, None)) + 2 * sys.getsizeof(0.0) + sys.getsizeof(1)
+
+
+def _footprint(*containers: Any) -> int:
+    return sum(sys.getsizeof(container) for container in containers if container is not None)
+
+
+class _ParentMap(Protocol[T]):
+    """The parent of every discovered state: a dict, or `_CodeParents` for codes."""
+
+    def __contains__(self, state: T) -> bool:
+        ...
+
+    def __getitem__(self, state: T) -> Optional[T]:
+        ...
+
+    def __setitem__(self, state: T, parent: Optional[T]) -> None:
+        ...
+
+
+class _CostMap(Protocol[T_contra]):
+    """The path cost of every discovered state: a dict, or `_CodeCosts` for codes."""
+
+    def __contains__(self, state: T_contra) -> bool:
+        ...
+
+    def __getitem__(self, state: T_contra) -> float:
+        ...
+
+    def __setitem__(self, state: T_contra, cost: float) -> None:
+        ...
+
+
+class _StateSet(Protocol[T_contra]):
+    """A set of states, or `_CodeSet` for codes."""
+
+    def __contains__(self, state: T_contra) -> bool:
+        ...
+
+    def add(self, state: T_contra) -> None:
+        ...
+
+
+class StateCodec(Generic[T]):
+    """A two-way mapping between search states and the integers ``range(size)``.
+
+    A search given a codec keeps its parents, costs and closed set in flat
+    arrays indexed by code instead of dicts and sets of the states, which
+    costs a few bytes per possible state rather than a few hundred per
+    visited one.  The frontier then holds codes too.
+    """
+
+    def __init__(self, encode: Callable[[T], int], decode: Callable[[int], T], size: int) -> None:
+        self.encode: Callable[[T], int] = encode
+        self.decode: Callable[[int], T] = decode
+        self.size: int = size
+
+    def goal_test(self, goal_test: Callable[[T], bool]) -> Callable[[int], bool]:
+        decode = self.decode
+        return lambda code: goal_test(decode(code))
+
+    def heuristic(self, heuristic: Callable[[T], float]) -> Callable[[int], float]:
+        decode = self.decode
+        return lambda code: heuristic(decode(code))
+
+    def successors(
+        self, successors: Callable[[T], Iterable[Any]], weighted: bool = False
+    ) -> Callable[[int], Iterable[Any]]:
+        encode, decode = self.encode, self.decode
+        if weighted:
+            return lambda code: ((encode(child), cost) for child, cost in successors(decode(code)))
+        return lambda code: map(encode, successors(decode(code)))
+
+    def parents(self) -> _CodeParents:
+        return _CodeParents(self.size)
+
+    def costs(self) -> _CodeCosts:
+        return _CodeCosts(self.size)
+
+    def closed(self) -> _CodeSet:
+        return _CodeSet(self.size)
+
+    def decode_node(self, node: Optional[Node[int]]) -> Optional[Node[T]]:
+        """Replace the codes in a chain of `Node`s by their states."""
+        current: Optional[Node[Any]] = node
+        while current is not None:
+            current.state = self.decode(current.state)
+            current = current.parent
+        return cast("Optional[Node[T]]", node)
+
+
+class _CodeParents:
+    """A dict of parent codes kept in an array, -1 marks a root and -2 an unseen state."""
+
+    __slots__ = ("_codes",)
+
+    def __init__(self, size: int) -> None:
+        self._codes = array("i" if size < 2**31 else "q", [-2]) * size
+
+    def __contains__(self, code: int) -> bool:
+        return self._codes[code] != -2
+
+    def __getitem__(self, code: int) -> Optional[int]:
+        parent = self._codes[code]
+        if parent == -2:
+            raise KeyError(code)
+        return None if parent == -1 else parent
+
+    def __setitem__(self, code: int, parent: Optional[int]) -> None:
+        self._codes[code] = -1 if parent is None else parent
+
+    def __len__(self) -> int:
+        return len(self._codes) - self._codes.count(-2)
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + self._codes.__sizeof__()
+
+
+class _CodeCosts:
+    """A dict of path costs kept in an array, infinity marks an unseen state."""
+
+    __slots__ = ("_costs",)
+
+    def __init__(self, size: int) -> None:
+        self._costs = array("d", [inf]) * size
+
+    def __contains__(self, code: int) -> bool:
+        return self._costs[code] != inf
+
+    def __getitem__(self, code: int) -> float:
+        cost = self._costs[code]
+        if cost == inf:
+            raise KeyError(code)
+        return cost
+
+    def __setitem__(self, code: int, cost: float) -> None:
+        self._costs[code] = cost
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + self._costs.__sizeof__()
+
+
+class _CodeSet:
+    """A set of codes kept as one byte per possible code."""
+
+    __slots__ = ("_members",)
+
+    def __init__(self, size: int) -> None:
+        self._members = bytearray(size)
+
+    def __contains__(self, code: int) -> bool:
+        return self._members[code] != 0
+
+    def add(self, code: int) -> None:
+        self._members[code] = 1
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + self._members.__sizeof__()
+
+
+def _graph_search(
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], Iterable[T]],
+    last_in_first_out: bool,
+    codec: Optional[StateCodec[T]],
+    stats: Optional[SearchStats],
+    callback: Optional[Progress],
+    every: int,
+) -> Optional[Node[T]]:
+    """Search depth or breadth first, remembering the parent of every discovered state."""
+    if callback is not None and stats is None:
+        stats = SearchStats()
+    if codec is not None:
+        node = _graph_search_core(
+            codec.encode(initial),
+            codec.goal_test(goal_test),
+            codec.successors(successors),
+            last_in_first_out,
+            codec.parents(),
+            stats,
+            callback,
+            every,
+        )
+        return codec.decode_node(node)
+    return _graph_search_core(
+        initial, goal_test, successors, last_in_first_out, {}, stats, callback, every
+    )
+
+
+def _graph_search_core(
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], Iterable[T]],
+    last_in_first_out: bool,
+    parents: _ParentMap[T],
+    stats: Optional[SearchStats],
+    callback: Optional[Progress],
+    every: int,
+) -> Optional[Node[T]]:
+    """Run `_graph_search` over states or, with a codec, over their codes."""
+    parents[initial] = None
+    frontier: Deque[T] = Deque([initial])
+    pop = frontier.pop if last_in_first_out else frontier.popleft
+    expanded = peak_frontier = 0
+    discovered = 1
+    start = perf_counter()
+
+    def update(stats: SearchStats) -> None:
+        stats.expanded = expanded
+        stats.frontier = len(frontier)
+        stats.peak_frontier = max(stats.peak_frontier, peak_frontier)
+        stats.explored = discovered
+        stats.peak_memory = max(stats.peak_memory, _footprint(parents, frontier))
+        stats.elapsed = perf_counter() - start
+
+    try:
+        while frontier:
+            if stats is not None:
+                peak_frontier = max(peak_frontier, len(frontier))
+            current_state = pop()
+            if goal_test(current_state):
+                return _path_node(current_state, parents)
+            expanded += 1
+            if callback is not None and stats is not None and expanded % every == 0:
+                update(stats)
+                callback(stats)
+            for child in successors(current_state):
+                if child in parents:
+                    continue
+                discovered += 1
+                parents[child] = current_state
+                frontier.append(child)
+        return None
+    finally:
+        if stats is not None:
+            update(stats)
+
+
 def dfs(
-    initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]]
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], List[T]],
+    codec: Optional[StateCodec[T]] = None,
+    stats: Optional[SearchStats] = None,
+    callback: Optional[Progress] = None,
+    every: int = 10_000,
 ) -> Optional[Node[T]]:
-    frontier: Stack[Node[T]] = Stack()
-    frontier.push(Node(initial, None))
-    explored: Set[T] = {initial}
-    while not frontier.empty:
-        current_node: Node[T] = frontier.pop()
-        current_state: T = current_node.state
-        if goal_test(current_state):
-            return current_node
-        for child in successors(current_state):
-            if child in explored:
-                continue
-            explored.add(child)
-            frontier.push(Node(child, current_node))
-    return None
+    return _graph_search(initial, goal_test, successors, True, codec, stats, callback, every)
 
 
 def node_to_path(node: Node[T]) -> List[T]:
@@ -138,22 +419,15 @@ class Queue(Generic[T]):
 
 
 def bfs(
-    initial: T, goal_test: Callable[[T], bool], successors: Callable[[T], List[T]]
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], List[T]],
+    codec: Optional[StateCodec[T]] = None,
+    stats: Optional[SearchStats] = None,
+    callback: Optional[Progress] = None,
+    every: int = 10_000,
 ) -> Optional[Node[T]]:
-    frontier: Queue[T] = Queue()
-    frontier.push(Node(initial, None))
-    explored: Set[T] = {initial}
-    while not frontier.empty:
-        current_node: Node[T] = frontier.pop()
-        current_state: T = current_node.state
-        if goal_test(current_state):
-            return current_node
-        for child in successors(current_state):
-            if child in explored:
-                continue
-            explored.add(child)
-            frontier.push(Node(child, current_node))
-    return None
+    return _graph_search(initial, goal_test, successors, False, codec, stats, callback, every)
 
 
 class PriorityQueue(Generic[T]):
@@ -174,28 +448,675 @@ class PriorityQueue(Generic[T]):
         return repr(self._container)
 
 
+def _path_node(
+    state: T,
+    parents: _ParentMap[T],
+    costs: Optional[_CostMap[T]] = None,
+    heuristic: Optional[Callable[[T], float]] = None,
+) -> Node[T]:
+    """Build the chain of `Node`s from the initial state to `state`."""
+    node: Optional[Node[T]] = None
+    for step in parents_to_path(parents, state):
+        node = Node(
+            step,
+            node,
+            costs[step] if costs is not None else 0.0,
+            heuristic(step) if heuristic is not None else 0.0,
+        )
+    # the path holds at least `state`
+    assert node is not None
+    return node
+
+
+def _astar(
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], Iterable[Any]],
+    heuristic: Callable[[T], float],
+    weighted: bool,
+    closed: bool,
+    codec: Optional[StateCodec[T]],
+    stats: Optional[SearchStats],
+    callback: Optional[Progress],
+    every: int,
+) -> Optional[Node[T]]:
+    if callback is not None and stats is None:
+        stats = SearchStats()
+    # the expanded states are only needed for a closed set or to count reopenings
+    track = closed or stats is not None
+    if codec is not None:
+        node = _astar_core(
+            codec.encode(initial),
+            codec.goal_test(goal_test),
+            codec.successors(successors, weighted),
+            codec.heuristic(heuristic),
+            weighted,
+            closed,
+            codec.parents(),
+            codec.costs(),
+            codec.closed() if track else None,
+            stats,
+            callback,
+            every,
+        )
+        return codec.decode_node(node)
+    return _astar_core(
+        initial,
+        goal_test,
+        successors,
+        heuristic,
+        weighted,
+        closed,
+        {},
+        {},
+        set() if track else None,
+        stats,
+        callback,
+        every,
+    )
+
+
+def _astar_core(
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], Iterable[Any]],
+    heuristic: Callable[[T], float],
+    weighted: bool,
+    closed: bool,
+    parents: _ParentMap[T],
+    costs: _CostMap[T],
+    expanded_states: Optional[_StateSet[T]],
+    stats: Optional[SearchStats],
+    callback: Optional[Progress],
+    every: int,
+) -> Optional[Node[T]]:
+    """Run `_astar` over states or, with a codec, over their codes."""
+    closed_states = expanded_states if closed else None
+    counter = count(1)
+    frontier: List[Tuple[float, float, int, T]] = [(heuristic(initial), -0.0, 0, initial)]
+    costs[initial] = 0.0
+    parents[initial] = None
+    expanded = peak_frontier = reopened = 0
+    discovered = 1
+    start = perf_counter()
+
+    def update(stats: SearchStats) -> None:
+        stats.expanded = expanded
+        stats.frontier = len(frontier)
+        stats.peak_frontier = max(stats.peak_frontier, peak_frontier)
+        stats.explored = discovered
+        stats.reopened = reopened
+        stats.peak_memory = max(
+            stats.peak_memory,
+            _footprint(parents, costs, frontier, expanded_states)
+            + len(frontier) * _HEAP_ENTRY_BYTES,
+        )
+        stats.elapsed = perf_counter() - start
+
+    try:
+        while frontier:
+            if stats is not None:
+                peak_frontier = max(peak_frontier, len(frontier))
+            _, negative_cost, _, current_state = heappop(frontier)
+            current_cost = -negative_cost
+            if current_cost > costs[current_state]:
+                continue
+            if expanded_states is not None:
+                if current_state in expanded_states:
+                    if closed:
+                        continue
+                    reopened += 1
+                else:
+                    expanded_states.add(current_state)
+            if goal_test(current_state):
+                return _path_node(current_state, parents, costs, heuristic)
+            expanded += 1
+            if callback is not None and stats is not None and expanded % every == 0:
+                update(stats)
+                callback(stats)
+            for child in successors(current_state):
+                if weighted:
+                    child, step_cost = child
+                else:
+                    step_cost = 1
+                if closed_states is not None and child in closed_states:
+                    continue
+                new_cost = current_cost + step_cost
+                if child not in costs:
+                    discovered += 1
+                elif costs[child] <= new_cost:
+                    continue
+                costs[child] = new_cost
+                parents[child] = current_state
+                heappush(frontier, (new_cost + heuristic(child), -new_cost, next(counter), child))
+        return None
+    finally:
+        if stats is not None:
+            update(stats)
+
+
 def astar(
     initial: T,
     goal_test: Callable[[T], bool],
-    successors: Callable[[T], List[T]],
+    successors: Callable[[T], Iterable[Any]],
     heuristic: Callable[[T], float],
+    weighted: bool = False,
+    closed: bool = False,
+    codec: Optional[StateCodec[T]] = None,
+    stats: Optional[SearchStats] = None,
+    callback: Optional[Progress] = None,
+    every: int = 10_000,
+) -> Optional[Node[T]]:
+    """Find the cheapest path from `initial` to a goal state.
+
+    With `weighted` the successors are ``(state, cost)`` pairs, otherwise every
+    step costs 1.  The frontier holds plain ``(f, -g, counter, state)`` tuples,
+    so ties on f go to the deeper state and then to the older entry, and
+    entries made stale by a cheaper path are skipped when popped.  Pass
+    `closed` when the heuristic is consistent to never reopen an expanded state
+    and a `codec` to keep the bookkeeping in arrays indexed by state code.
+
+    A `stats` object is filled in when the search ends and, with a
+    `callback`, refreshed and passed to ``callback(stats)`` every `every`
+    expansions.  `dfs` and `bfs` take the same arguments.
+    """
+    return _astar(
+        initial,
+        goal_test,
+        successors,
+        heuristic,
+        weighted,
+        closed,
+        codec,
+        stats,
+        callback,
+        every,
+    )
+
+
+def ida_star(
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], Iterable[Any]],
+    heuristic: Callable[[T], float],
+    weighted: bool = False,
+    stats: Optional[SearchStats] = None,
+) -> Optional[Node[T]]:
+    """Find the cheapest path like `astar` while only storing the current path.
+
+    Runs depth-first searches bounded by f = g + h, raising the bound to the
+    smallest f that exceeded it, until a goal is found.  States already on
+    the path are skipped, nothing else is remembered, so memory grows with
+    the depth of the solution at the price of re-expanding states.  The
+    heuristic must be admissible for the path to be the cheapest.
+    """
+    if goal_test(initial):
+        return Node(initial, None, 0.0, heuristic(initial))
+    expanded = 0
+    peak_frontier = 1
+    start = perf_counter()
+    try:
+        bound = heuristic(initial)
+        while True:
+            next_bound = inf
+            path: List[T] = [initial]
+            path_costs: List[float] = [0.0]
+            on_path: Set[T] = {initial}
+            children: List[Iterator[Any]] = [iter(successors(initial))]
+            expanded += 1
+            while children:
+                for child in children[-1]:
+                    if weighted:
+                        child, step_cost = child
+                    else:
+                        step_cost = 1
+                    if child in on_path:
+                        continue
+                    new_cost = path_costs[-1] + step_cost
+                    estimate = new_cost + heuristic(child)
+                    if estimate > bound:
+                        next_bound = min(next_bound, estimate)
+                        continue
+                    path.append(child)
+                    path_costs.append(new_cost)
+                    if goal_test(child):
+                        node: Optional[Node[T]] = None
+                        for state, cost in zip(path, path_costs):
+                            node = Node(state, node, cost, heuristic(state))
+                        return node
+                    on_path.add(child)
+                    children.append(iter(successors(child)))
+                    expanded += 1
+                    peak_frontier = max(peak_frontier, len(children))
+                    break
+                else:
+                    children.pop()
+                    on_path.discard(path.pop())
+                    path_costs.pop()
+            if next_bound == inf:
+                return None
+            bound = next_bound
+    finally:
+        if stats is not None:
+            stats.expanded = expanded
+            stats.peak_frontier = max(stats.peak_frontier, peak_frontier)
+            stats.elapsed = perf_counter() - start
+
+
+def beam_search(
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], Iterable[Any]],
+    heuristic: Callable[[T], float],
+    weighted: bool = False,
+    width: int = 1000,
+    stats: Optional[SearchStats] = None,
+) -> Optional[Node[T]]:
+    """Search breadth first, keeping only the `width` most promising states per level.
+
+    States are ranked by f = g + h.  Only the states chosen for a beam keep
+    their cost and parent, so memory is bounded by the width times the depth
+    of the search and `stats.explored` counts those states.  The path found
+    may not be the cheapest and a narrow beam can miss the goal altogether.
+    """
+    costs: Dict[T, float] = {initial: 0.0}
+    parents: Dict[T, Optional[T]] = {initial: None}
+    beam: List[T] = [initial]
+    expanded = peak_frontier = 0
+    start = perf_counter()
+    try:
+        while beam:
+            # the cost of and the best parent for each child of the beam
+            candidates: Dict[T, Tuple[float, T]] = {}
+            for current_state in beam:
+                if goal_test(current_state):
+                    return _path_node(current_state, parents, costs, heuristic)
+                expanded += 1
+                current_cost = costs[current_state]
+                for child in successors(current_state):
+                    if weighted:
+                        child, step_cost = child
+                    else:
+                        step_cost = 1
+                    new_cost = current_cost + step_cost
+                    if child in costs and costs[child] <= new_cost:
+                        continue
+                    if child in candidates and candidates[child][0] <= new_cost:
+                        continue
+                    candidates[child] = (new_cost, current_state)
+            peak_frontier = max(peak_frontier, len(candidates))
+            beam = nsmallest(
+                width, candidates, key=lambda state: candidates[state][0] + heuristic(state)
+            )
+            for state in beam:
+                costs[state], parents[state] = candidates[state]
+        return None
+    finally:
+        if stats is not None:
+            stats.expanded = expanded
+            stats.peak_frontier = max(stats.peak_frontier, peak_frontier)
+            stats.explored = len(costs)
+            stats.peak_memory = max(stats.peak_memory, _footprint(parents, costs))
+            stats.elapsed = perf_counter() - start
+
+
+def cached_successors(
+    successors: Callable[[T], Iterable[Any]], maxsize: Optional[int] = 100_000
+) -> Callable[[T], Tuple[Any, ...]]:
+    """Memoize `successors` in a least-recently-used cache of `maxsize` states.
+
+    The returned function has ``cache_info()`` for the hit and miss counts and
+    ``cache_clear()``, as with `functools.lru_cache`; pass the same function
+    to several searches over one graph to share what it has computed.  Each
+    result is kept as a tuple, so `successors` may return any iterable.
+    """
+
+    @lru_cache(maxsize)
+    def cached(state: T) -> Tuple[Any, ...]:
+        return tuple(successors(state))
+
+    return cached
+
+
+class ContractedGraph(Generic[T]):
+    """A graph of points of interest joined by weighted edges along the corridors between them.
+
+    Starting from `sources`, the graph of `successors` is walked and every
+    state that is a source, is not a corridor (a corridor state has exactly two
+    successors) or satisfies `keep` becomes a vertex.  Each corridor between two
+    vertices becomes an `Edge` weighted by its length, keeping the shortest when
+    several join the same pair.  `successors` must be symmetric, as it is in a
+    maze, and searches over the result must start and end at vertices.
+    """
+
+    def __init__(
+        self,
+        sources: Iterable[T],
+        successors: Callable[[T], Iterable[T]],
+        keep: Optional[Callable[[T], bool]] = None,
+    ) -> None:
+        self.edges: Dict[T, List[Edge]] = {}
+        pending: List[T] = list(dict.fromkeys(sources))
+        for source in pending:
+            self.edges[source] = []
+        while pending:
+            vertex = pending.pop()
+            lengths: Dict[T, float] = {}
+            for current_state in successors(vertex):
+                previous_state, length = vertex, 1
+                while current_state not in self.edges:
+                    children = list(successors(current_state))
+                    if len(children) != 2 or (keep is not None and keep(current_state)):
+                        self.edges[current_state] = []
+                        pending.append(current_state)
+                        break
+                    previous_state, current_state = (
+                        current_state,
+                        children[1] if children[0] == previous_state else children[0],
+                    )
+                    length += 1
+                if current_state != vertex and length < lengths.get(current_state, inf):
+                    lengths[current_state] = length
+            self.edges[vertex] = [
+                Edge(vertex, target, length) for target, length in lengths.items()
+            ]
+
+    def successors(self, state: T) -> List[Tuple[T, float]]:
+        """The ``(vertex, cost)`` pairs reachable from `state`, for a weighted search."""
+        # edges hold their vertices as Hashable, here they are always states
+        return cast(List[Tuple[T, float]], [(edge.v, edge.weight) for edge in self.edges[state]])
+
+
+_parallel_successors: Optional[Callable[[Any], Iterable[Any]]] = None
+
+
+def _parallel_init(successors: Callable[[T], Iterable[T]]) -> None:
+    global _parallel_successors
+    _parallel_successors = successors
+
+
+def _parallel_expand(states: List[T]) -> List[List[T]]:
+    successors = _parallel_successors
+    assert successors is not None, "_parallel_init() was not called"
+    return [list(successors(state)) for state in states]
+
+
+def parallel_bfs(
+    initial: T,
+    goal_test: Callable[[T], bool],
+    successors: Callable[[T], Iterable[T]],
+    workers: Optional[int] = None,
+    chunksize: int = 64,
 ) -> Optional[Node[T]]:
-    frontier: PriorityQueue[Node[T]] = PriorityQueue()
-    frontier.push(Node(initial, None, 0.0, heuristic(initial)))
-    explored: Dict[T, float] = {initial: 0.0}
-    while not frontier.empty:
-        current_node: Node[T] = frontier.pop()
-        current_state: T = current_node.state
-        if goal_test(current_state):
-            return current_node
+    """Search breadth first like `bfs`, generating successors in worker processes.
+
+    The search runs one level at a time: the level is split into chunks of
+    `chunksize` states whose successors are generated by a pool of `workers`
+    processes, so `successors` must be picklable, while goal tests and
+    duplicate removal happen here in level order.  That makes the result the
+    same as `bfs`, and it pays off when `successors` is expensive.  Levels
+    smaller than a chunk and ``workers=1`` run in this process.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    pool = multiprocessing.Pool(workers, _parallel_init, (successors,)) if workers > 1 else None
+    parents: Dict[T, Optional[T]] = {initial: None}
+    level: List[T] = [initial]
+    try:
+        while level:
+            for current_state in level:
+                if goal_test(current_state):
+                    return _path_node(current_state, parents)
+            if pool is None or len(level) < chunksize:
+                expansions = [list(successors(state)) for state in level]
+            else:
+                chunks = [level[i : i + chunksize] for i in range(0, len(level), chunksize)]
+                expansions = [
+                    children for chunk in pool.imap(_parallel_expand, chunks) for children in chunk
+                ]
+            next_level: List[T] = []
+            for current_state, children in zip(level, expansions):
+                for child in children:
+                    if child not in parents:
+                        parents[child] = current_state
+                        next_level.append(child)
+            level = next_level
+        return None
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
+def dijkstra(
+    sources: Iterable[T],
+    successors: Callable[[T], Iterable[Any]],
+    targets: Optional[Iterable[T]] = None,
+    weighted: bool = False,
+) -> Tuple[Dict[T, float], Dict[T, Optional[T]]]:
+    """Find the distance from the nearest of `sources` to every reachable state.
+
+    `sources` is an iterable of states, so a single state must be wrapped, as
+    in ``dijkstra([start], successors)``.  Returns the distance map and the
+    parent map, where sources have no parent.  With `weighted` the successors
+    are ``(state, cost)`` pairs, otherwise every step costs 1 and the search
+    runs breadth first.  When `targets` is given the search stops as soon as
+    all of them have been settled, so the maps cover at least every target
+    reachable from the sources and only hold final distances.
+    """
+    distances: Dict[T, float] = {}
+    parents: Dict[T, Optional[T]] = {}
+    for source in sources:
+        distances[source] = 0
+        parents[source] = None
+    remaining: Optional[Set[T]] = set(targets) if targets is not None else None
+
+    if not weighted:
+        frontier: Deque[T] = Deque(distances)
+        while frontier:
+            current_state = frontier.popleft()
+            if remaining is not None:
+                remaining.discard(current_state)
+                if not remaining:
+                    break
+            new_distance = distances[current_state] + 1
+            for child in successors(current_state):
+                if child not in distances:
+                    distances[child] = new_distance
+                    parents[child] = current_state
+                    frontier.append(child)
+        return distances, parents
+
+    counter = count()
+    heap: List[Tuple[float, int, T]] = [(0, next(counter), source) for source in distances]
+    settled: Set[T] = set()
+    while heap:
+        distance, _, current_state = heappop(heap)
+        if current_state in settled:
+            continue
+        settled.add(current_state)
+        if remaining is not None:
+            remaining.discard(current_state)
+            if not remaining:
+                # drop the tentative distances of states that were never settled
+                distances = {state: distances[state] for state in settled}
+                parents = {state: parents[state] for state in settled}
+                break
+        for child, step_cost in successors(current_state):
+            new_distance = distance + step_cost
+            if child not in distances or distances[child] > new_distance:
+                distances[child] = new_distance
+                parents[child] = current_state
+                heappush(heap, (new_distance, next(counter), child))
+    return distances, parents
+
+
+def parents_to_path(parents: _ParentMap[T], state: T) -> List[T]:
+    """Follow a parent map from `state` back to its source."""
+    path: List[T] = [state]
+    parent = parents[state]
+    while parent is not None:
+        path.append(parent)
+        parent = parents[parent]
+    path.reverse()
+    return path
+
+
+def _meeting_node(
+    meeting: T,
+    forward: Tuple[Dict[T, Optional[T]], Dict[T, float]],
+    backward: Tuple[Dict[T, Optional[T]], Dict[T, float]],
+    heuristic: Callable[[T], float],
+) -> Node[T]:
+    """Join the two halves of a bidirectional search at `meeting` into a `Node` chain."""
+    forward_parents, forward_costs = forward
+    backward_parents, backward_costs = backward
+    total = forward_costs[meeting] + backward_costs[meeting]
+    node = _path_node(meeting, forward_parents, forward_costs, heuristic)
+    state = backward_parents[meeting]
+    while state is not None:
+        node = Node(state, node, total - backward_costs[state], heuristic(state))
+        state = backward_parents[state]
+    return node
+
+
+def _expand_level(
+    level: List[T],
+    successors: Callable[[T], Iterable[T]],
+    parents: Dict[T, Optional[T]],
+    depths: Dict[T, float],
+    other_depths: Dict[T, float],
+) -> Tuple[List[T], Optional[T]]:
+    """Expand one breadth-first level, returning the next level and the best meeting state."""
+    next_level: List[T] = []
+    meeting: Optional[T] = None
+    for current_state in level:
+        depth = depths[current_state] + 1
         for child in successors(current_state):
-            new_cost: float = current_node.cost + 1
-            if child not in explored or explored[child] > new_cost:
-                explored[child] = new_cost
-                frontier.push(Node(child, current_node, new_cost, heuristic(child)))
+            if child in depths:
+                continue
+            parents[child] = current_state
+            depths[child] = depth
+            next_level.append(child)
+            if child in other_depths and (
+                meeting is None or other_depths[child] < other_depths[meeting]
+            ):
+                meeting = child
+    return next_level, meeting
+
+
+def bidirectional_bfs(
+    initial: T,
+    goal: T,
+    successors: Callable[[T], Iterable[T]],
+    predecessors: Optional[Callable[[T], Iterable[T]]] = None,
+) -> Optional[Node[T]]:
+    """Find a shortest path from `initial` to `goal` by searching from both ends.
+
+    `predecessors` lists the states that lead to a state and defaults to
+    `successors`, which suits undirected graphs.  Each round expands a whole
+    level of the smaller frontier and the search stops after the first level
+    in which the two sides meet.
+    """
+    if initial == goal:
+        return Node(initial, None)
+    backwards = predecessors or successors
+    forward_parents: Dict[T, Optional[T]] = {initial: None}
+    forward_depths: Dict[T, float] = {initial: 0}
+    backward_parents: Dict[T, Optional[T]] = {goal: None}
+    backward_depths: Dict[T, float] = {goal: 0}
+    forward_level: List[T] = [initial]
+    backward_level: List[T] = [goal]
+    while forward_level and backward_level:
+        if len(forward_level) <= len(backward_level):
+            forward_level, meeting = _expand_level(
+                forward_level, successors, forward_parents, forward_depths, backward_depths
+            )
+        else:
+            backward_level, meeting = _expand_level(
+                backward_level, backwards, backward_parents, backward_depths, forward_depths
+            )
+        if meeting is not None:
+            return _meeting_node(
+                meeting,
+                (forward_parents, forward_depths),
+                (backward_parents, backward_depths),
+                lambda state: 0.0,
+            )
     return None
 
 
+def bidirectional_astar(
+    initial: T,
+    goal: T,
+    successors: Callable[[T], Iterable[Any]],
+    heuristic: Callable[[T, T], float],
+    predecessors: Optional[Callable[[T], Iterable[Any]]] = None,
+    weighted: bool = False,
+) -> Optional[Node[T]]:
+    """Find the cheapest path from `initial` to `goal` by searching from both ends.
+
+    `heuristic(state, target)` estimates the cost between two states and must
+    be consistent in both directions.  `predecessors` defaults to `successors`
+    and, like them, yields ``(state, cost)`` pairs when `weighted` is set.
+    The side with the smaller frontier is expanded first and the search stops
+    once either frontier can no longer improve on the best meeting found.
+    """
+    if initial == goal:
+        return Node(initial, None, 0.0, heuristic(initial, goal))
+    backwards = predecessors or successors
+    forward_parents: Dict[T, Optional[T]] = {initial: None}
+    forward_costs: Dict[T, float] = {initial: 0.0}
+    backward_parents: Dict[T, Optional[T]] = {goal: None}
+    backward_costs: Dict[T, float] = {goal: 0.0}
+    forward_frontier: List[Tuple[float, float, int, T]] = [
+        (heuristic(initial, goal), -0.0, 0, initial)
+    ]
+    backward_frontier: List[Tuple[float, float, int, T]] = [
+        (heuristic(goal, initial), -0.0, 0, goal)
+    ]
+    counter = count(1)
+    best_cost = float("inf")
+    meeting: Optional[T] = None
+    while forward_frontier and backward_frontier:
+        if forward_frontier[0][0] >= best_cost or backward_frontier[0][0] >= best_cost:
+            break
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, expand, target = forward_frontier, successors, goal
+            parents, costs, other_costs = forward_parents, forward_costs, backward_costs
+        else:
+            frontier, expand, target = backward_frontier, backwards, initial
+            parents, costs, other_costs = backward_parents, backward_costs, forward_costs
+        _, negative_cost, _, current_state = heappop(frontier)
+        current_cost = -negative_cost
+        if current_cost > costs[current_state]:
+            continue
+        for child in expand(current_state):
+            if weighted:
+                child, step_cost = child
+            else:
+                step_cost = 1
+            new_cost = current_cost + step_cost
+            if child in costs and costs[child] <= new_cost:
+                continue
+            costs[child] = new_cost
+            parents[child] = current_state
+            heappush(
+                frontier, (new_cost + heuristic(child, target), -new_cost, next(counter), child)
+            )
+            if child in other_costs and new_cost + other_costs[child] < best_cost:
+                best_cost = new_cost + other_costs[child]
+                meeting = child
+    if meeting is None:
+        return None
+    return _meeting_node(
+        meeting,
+        (forward_parents, forward_costs),
+        (backward_parents, backward_costs),
+        lambda state: heuristic(state, goal),
+    )
+
+
 if __name__ == "__main__":
     print(linear_contains([1, 5, 15, 15, 15, 15, 20], 5))
     print(binary_contains(["a", "d", "e", "f", "z"], "f"))
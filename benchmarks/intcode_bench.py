@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Benchmark the Intcode VM on synthetic workloads.
+
+Run from the repository root with ``python -m benchmarks.intcode_bench``.
+Every workload runs on each backend and reports instructions per second and
+peak memory, the reset workload also reports the cost of a reset.  Results
+can be saved as a JSON baseline and later runs compared against it.  The
+numbers depend on the machine, so the checked in baseline is only a
+reference: run ``make bench-baseline`` before ``make bench-compare`` on
+another machine.
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from aoclib.intcode import Intcode
+
+Metrics = Dict[str, Dict[str, float]]
+
+
+def countdown(n: int) -> List[int]:
+    """Decrement a positional counter until it reaches zero."""
+    return [
+        1101, 0, n, 100,     # add  #0, #n -> $100
+        1001, 100, -1, 100,  # add  $100, #-1 -> $100
+        1005, 100, 4,        # jnz  $100, #4
+        4, 100,              # out  $100
+        99,
+    ]  # fmt: skip
+
+
+def triangle(n: int) -> List[int]:
+    """Sum n + (n - 1) + ... + 1 using relative-base addressing."""
+    return [
+        109, 200,            # rbo  #200
+        21101, 0, n, 0,      # add  #0, #n -> @0
+        21101, 0, 0, 1,      # add  #0, #0 -> @1
+        22201, 1, 0, 1,      # add  @1, @0 -> @1
+        21201, 0, -1, 0,     # add  @0, #-1 -> @0
+        1206, 0, 24,         # jz   @0, #24
+        1105, 1, 10,         # jnz  #1, #10
+        204, 1,              # out  @1
+        99,
+    ]  # fmt: skip
+
+
+def chatter(n: int) -> List[int]:
+    """Output every value of a counter from n down to one."""
+    return [
+        1101, 0, n, 100,     # add  #0, #n -> $100
+        4, 100,              # out  $100
+        1001, 100, -1, 100,  # add  $100, #-1 -> $100
+        1005, 100, 4,        # jnz  $100, #4
+        99,
+    ]  # fmt: skip
+
+
+def self_modifying(n: int) -> List[int]:
+    """Count down the immediate operand of the loop's own jump."""
+    return [
+        101, -1, 5, 5,       # add  #-1, $5 -> $5
+        1105, n, 0,          # jnz  #n, #0
+        99,
+    ]  # fmt: skip
+
+
+def fill(n: int) -> List[int]:
+    """Write ones to n consecutive cells starting at address 1000."""
+    return [
+        1101, 0, n, 30,      # add  #0, #n -> $30
+        109, 1000,           # rbo  #1000
+        21101, 0, 1, 0,      # add  #0, #1 -> @0
+        109, 1,              # rbo  #1
+        1001, 30, -1, 30,    # add  $30, #-1 -> $30
+        1005, 30, 6,         # jnz  $30, #6
+        99,
+    ]  # fmt: skip
+
+
+WORKLOADS: Dict[str, Callable[[int], List[int]]] = {
+    "countdown": countdown,
+    "triangle": triangle,
+    "chatter": chatter,
+    "self_modifying": self_modifying,
+}
+
+
+def execute(vm: Intcode) -> None:
+    """Run the VM to completion, resuming after every output in chained mode."""
+    while vm.execute() is True:
+        pass
+
+
+def measure(program: List[int], backend: str, repeat: int) -> Dict[str, float]:
+    """Return the best steps per second and the peak memory of running `program`."""
+    best = 0.0
+    for _ in range(repeat):
+        vm = Intcode(program, chained_mode=True, backend=backend)
+        start = time.perf_counter()
+        execute(vm)
+        best = max(best, vm.steps / (time.perf_counter() - start))
+    tracemalloc.start()
+    execute(Intcode(program, chained_mode=True, backend=backend))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"steps_per_sec": best, "peak_kib": peak / 1024}
+
+
+def measure_reset(backend: str, cells: int, resets: int) -> Dict[str, float]:
+    """Return the cost of a reset after a run that dirtied `cells` cells."""
+    vm = Intcode(fill(cells), chained_mode=True, backend=backend, memory_size=1000 + cells)
+    elapsed = 0.0
+    for _ in range(resets):
+        execute(vm)
+        start = time.perf_counter()
+        vm.reset()
+        elapsed += time.perf_counter() - start
+    return {"reset_us": elapsed / resets * 1e6}
+
+
+def run(size: int = 200_000, repeat: int = 3) -> Metrics:
+    """Run every workload on every backend."""
+    results: Metrics = {}
+    for backend in Intcode.BACKENDS:
+        for name, build in WORKLOADS.items():
+            results[f"{backend}/{name}"] = measure(build(size), backend, repeat)
+        results[f"{backend}/reset"] = measure_reset(backend, 2048, 200)
+    return results
+
+
+def regressions(results: Metrics, baseline: Metrics, tolerance: float) -> List[str]:
+    """Describe every metric that is more than `tolerance` worse than the baseline."""
+    found = []
+    for workload, metrics in baseline.items():
+        for metric, expected in metrics.items():
+            actual = results.get(workload, {}).get(metric)
+            if actual is None:
+                continue
+            if metric == "steps_per_sec":
+                worse = actual < expected * (1 - tolerance)
+            else:
+                worse = actual > expected * (1 + tolerance)
+            if worse:
+                found.append(f"{workload} {metric}: {actual:,.1f} (baseline {expected:,.1f})")
+    return found
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=200_000, help="loop count of each workload")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per workload, best is kept")
+    parser.add_argument("--save", metavar="FILE", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare the results to a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative change")
+    args = parser.parse_args()
+
+    results = run(args.size, args.repeat)
+    for workload, metrics in results.items():
+        columns = "  ".join(f"{key} {value:14,.1f}" for key, value in metrics.items())
+        print(f"{workload:30}", columns)
+    if args.save:
+        with open(args.save, "w") as outf:
+            json.dump(results, outf, indent=2, sort_keys=True)
+            outf.write("\n")
+    if args.compare:
+        with open(args.compare) as inf:
+            baseline = json.load(inf)
+        found = regressions(results, baseline, args.tolerance)
+        for regression in found:
+            print("regression:", regression, file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
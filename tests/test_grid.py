@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+from aoclib.search import dijkstra
+
+MAZE = [
+    "#########",
+    "#S..#...#",
+    "#.#.#.#.#",
+    "#.#...#.#",
+    "#.#####.#",
+    "#......G#",
+    "#########",
+]
+
+
+def maze_successors(cell):
+    x, y = cell
+    for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+        if MAZE[ny][nx] != "#":
+            yield (nx, ny)
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class GridUnitTests(unittest.TestCase):
+    def setUp(self):
+        from aoclib.grid import char_grid
+
+        self.grid = char_grid(MAZE)
+        self.passable = self.grid != "#"
+
+    def test_char_grid(self):
+        self.assertEqual(self.grid.shape, (7, 9))
+        self.assertEqual(self.grid[1, 1], "S")
+        self.assertEqual(self.grid[5, 7], "G")
+
+    def test_distance_field_matches_dijkstra(self):
+        from aoclib.grid import UNREACHABLE, distance_field
+
+        field = distance_field(self.passable, [(1, 1)])
+        expected, _ = dijkstra([(1, 1)], maze_successors)
+        for (y, x), distance in numpy.ndenumerate(field):
+            self.assertEqual(distance, expected.get((x, y), UNREACHABLE))
+
+    def test_distance_field_sources(self):
+        from aoclib.grid import distance_field
+
+        field = distance_field(self.passable, (self.grid == "S") | (self.grid == "G"))
+        self.assertEqual(field.max(), 7)
+        self.assertEqual(field[5, 7], 0)
+
+        # sources on walls are ignored
+        field = distance_field(self.passable, [(0, 0), (7, 5)])
+        self.assertEqual(field[1, 1], 10)
+
+        # so are sources outside the grid rather than wrapping into another row
+        field = distance_field(self.passable, [(12, 0), (-10, 2), (1, 9), (7, 5)])
+        self.assertEqual(field[1, 1], 10)
+
+        # an integer array holds pairs, only a boolean array is a mask
+        field = distance_field(self.passable, numpy.array([(7, 5)]))
+        self.assertEqual(field[5, 7], 0)
+        self.assertEqual(field[1, 1], 10)
+        with self.assertRaises(ValueError):
+            distance_field(self.passable, numpy.zeros((3, 3), dtype=bool))
+
+    def test_distance_field_options(self):
+        from aoclib.grid import UNREACHABLE, distance_field
+
+        field = distance_field(self.passable, [(1, 1)], max_distance=3)
+        self.assertEqual(field.max(), 3)
+        self.assertEqual(field[5, 7], UNREACHABLE)
+
+        open_grid = numpy.ones((5, 5), dtype=bool)
+        field = distance_field(open_grid, [(0, 0)], diagonal=True)
+        self.assertEqual(field[4, 4], 4)
+        self.assertEqual(field[4, 2], 4)
+        self.assertEqual(distance_field(open_grid, [(0, 0)])[4, 4], 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,440 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import itertools
+import json
+import unittest
+from typing import List, Sequence, Tuple
+
+from aoclib.intcode import Intcode, Memory, Network, Profile, disassemble, sweep
+
+
+QUINE = [109, 1, 204, -1, 1001, 100, 1, 100, 1008, 100, 16, 101, 1006, 101, 0, 99]
+
+# prints #20 then rewrites its first instruction to print $20 and loops once
+SELF_MODIFYING = [
+    104, 20, 1005, 21, 16, 1101, 0, 4, 0, 1101, 0, 1, 21, 1105, 1, 0, 99, 0, 0, 0, 555, 0
+]  # fmt: skip
+
+# stores 42 far beyond the program, reads it back relative to a far base
+FAR_MEMORY = [1101, 0, 42, 5000000, 109, 4999990, 204, 10, 99]
+
+# prints 7, then an add reading far memory overwrites its first instruction with a halt
+# and loops, printing 7 and 8 again if the stale instruction were run
+FAR_STORE_OVER_CODE = [
+    104, 7, 1005, 30, 20, 1101, 1, 0, 30, 1, 10000, 31, 0, 1105, 1, 0,
+    0, 0, 0, 0, 104, 8, 99, 0, 0, 0, 0, 0, 0, 0, 0, 99,
+]  # fmt: skip
+
+# adds each input to a running total and outputs it
+ACCUMULATOR = [3, 50, 1, 50, 51, 51, 4, 51, 1105, 1, 0]
+
+# outputs twice its input
+DOUBLER = [3, 9, 1002, 9, 2, 9, 4, 9, 99, 0]
+
+AMPLIFIER = [3, 15, 3, 16, 1002, 16, 10, 16, 1, 16, 15, 15, 4, 15, 99, 0, 0]
+
+FEEDBACK_AMPLIFIER = [
+    3, 26, 1001, 26, -4, 26, 3, 27, 1002, 27, 2, 27, 1, 27, 26,
+    27, 4, 27, 1001, 28, -1, 28, 1005, 28, 6, 99, 0, 0, 5,
+]  # fmt: skip
+
+# reads its address, then reports every input other than -1 to address 255
+REPORTER = [3, 100, 3, 101, 1008, 101, -1, 102, 1005, 102, 2, 104, 255, 4, 101, 4, 100, 1105, 1, 2]
+
+# counts down the immediate operand of its own jump instruction
+OPERAND_COUNTDOWN = [101, -1, 5, 5, 1105, 10, 0, 4, 5, 99]
+
+
+def run_chained(vm: Intcode, inputs: Sequence[int] = ()) -> List[int]:
+    vm.chained_mode = True
+    vm.add_inputs(list(inputs))
+    outputs = []
+    while vm.execute():
+        outputs.append(vm.last_output)
+    return outputs
+
+
+def feed(vm: Intcode, inputs: Sequence[int]) -> List[int]:
+    """Run until the VM needs more input than it was given."""
+    vm.chained_mode = True
+    vm.add_inputs(list(inputs))
+    outputs = []
+    try:
+        while vm.execute():
+            outputs.append(vm.last_output)
+    except IndexError:
+        pass
+    return outputs
+
+
+def gravity_assist(vm: Intcode, params: Tuple[int, int]) -> int:
+    vm.set_noun_and_verb(*params)
+    vm.execute()
+    return vm.tape[0]
+
+
+def echo_twice(vm: Intcode, value: int) -> int:
+    vm.chained_mode = True
+    vm.add_inputs([value, value])
+    vm.execute()
+    return vm.last_output
+
+
+def amplify(vm: Intcode, phases: Tuple[int, ...]) -> int:
+    vms = [vm.fork() for _ in phases]
+    for amplifier, phase in zip(vms, phases):
+        amplifier.add_inputs([phase])
+    vms[0].add_inputs([0])
+    Network.chain(vms, feedback=True).run()
+    return vms[-1].last_output
+
+
+class IntcodeUnitTests(unittest.TestCase):
+    backend = "interpreter"
+
+    def vm(self, program: List[int]) -> Intcode:
+        return Intcode(program, backend=self.backend)
+
+    def test_add_mul(self):
+        vm = self.vm([1, 9, 10, 3, 2, 3, 11, 0, 99, 30, 40, 50])
+        vm.execute()
+        self.assertEqual(vm.tape[0], 3500)
+
+    def test_compare(self):
+        program = [3, 9, 8, 9, 10, 9, 4, 9, 99, -1, 8]
+        self.assertEqual(run_chained(self.vm(program), [8]), [1])
+        self.assertEqual(run_chained(self.vm(program), [7]), [0])
+
+    def test_relative_base(self):
+        self.assertEqual(run_chained(self.vm(QUINE)), QUINE)
+
+    def test_self_modifying(self):
+        self.assertEqual(run_chained(self.vm(SELF_MODIFYING)), [20, 555])
+
+    def test_self_modifying_operand(self):
+        self.assertEqual(run_chained(self.vm(OPERAND_COUNTDOWN)), [0])
+
+    def test_far_store_over_code(self):
+        vm = self.vm(FAR_STORE_OVER_CODE)
+        vm.run()
+        self.assertEqual(vm.outputs, [7])
+        self.assertEqual(vm.tape[0], 99)
+
+    def test_negative_jump(self):
+        for program in ([1105, 1, -1], [1106, 0, -2], [1101, -1, 0, 5000000, 5, 0, 5000000]):
+            vm = self.vm(program)
+            self.assertRaises(IndexError, vm.execute)
+            self.assertFalse(vm.halted)
+            vm = self.vm(program)
+            self.assertRaises(IndexError, vm.run)
+            self.assertFalse(vm.halted)
+
+    def test_missing_halt(self):
+        self.assertRaises(EOFError, self.vm([1101, 1, 1, 0]).execute)
+        vm = self.vm([1101, 1, 1, 5])
+        vm.profile = Profile()
+        self.assertRaises(EOFError, vm.execute)
+
+    def test_reset(self):
+        vm = self.vm(SELF_MODIFYING)
+        self.assertEqual(run_chained(vm), [20, 555])
+        vm.reset()
+        self.assertEqual(run_chained(vm), [20, 555])
+
+    def test_patch_after_reset(self):
+        vm = self.vm([1101, 2, 3, 7, 4, 7, 99, 0])
+        vm.silent_mode = True
+        self.assertEqual(vm.execute(), 5)
+        vm.reset()
+        vm.tape[0] = 1102
+        self.assertEqual(vm.execute(), 6)
+        vm.reset()
+        vm.tape[1] = 5
+        self.assertEqual(vm.execute(), 8)
+
+    def test_reset_clears_io(self):
+        vm = self.vm(DOUBLER)
+        self.assertEqual(run_chained(vm, [4, 5]), [8])
+        vm.reset()
+        self.assertEqual(list(vm.inputs), [])
+        self.assertIsNone(vm.last_input)
+        self.assertIsNone(vm.last_output)
+
+    def test_noun_and_verb(self):
+        vm = self.vm([1, 0, 0, 0, 99])
+        vm.set_noun_and_verb(4, 4)
+        vm.execute()
+        self.assertEqual(vm.tape[0], 198)
+
+    def test_input_not_consumed_on_empty_queue(self):
+        vm = self.vm([3, 5, 4, 5, 99, 0])
+        vm.chained_mode = True
+        self.assertRaises(IndexError, vm.execute)
+        self.assertEqual(vm.ip, 0)
+        vm.add_inputs([17])
+        self.assertTrue(vm.execute())
+        self.assertEqual(vm.last_output, 17)
+
+    def test_far_memory(self):
+        vm = self.vm(FAR_MEMORY)
+        self.assertEqual(run_chained(vm), [42])
+        self.assertEqual(vm.tape[5000000], 42)
+        vm.reset()
+        self.assertEqual(vm.tape[5000000], 0)
+        self.assertEqual(run_chained(vm), [42])
+
+    def test_reset_after_noun_and_verb(self):
+        vm = self.vm([1, 0, 0, 0, 99])
+        for noun in range(5):
+            vm.reset()
+            vm.set_noun_and_verb(noun, 0)
+            vm.execute()
+            self.assertEqual(vm.tape[0], [1, noun, 0, 0, 99][noun] + 1)
+
+    def test_snapshot_restore(self):
+        vm = self.vm(ACCUMULATOR)
+        self.assertEqual(feed(vm, [5]), [5])
+        snapshot = vm.snapshot()
+        self.assertEqual(feed(vm, [3]), [8])
+        vm.restore(snapshot)
+        self.assertEqual(feed(vm, [10]), [15])
+        vm.reset()
+        vm.restore(snapshot)
+        self.assertEqual(feed(vm, [1, 1]), [6, 7])
+
+    def test_snapshot_shares_pages(self):
+        vm = self.vm(ACCUMULATOR)
+        feed(vm, [5])
+        first = vm.snapshot()
+        vm.restore(first)
+        second = vm.snapshot()
+        self.assertIs(first.pages[0], second.pages[0])
+        feed(vm, [1])
+        self.assertIsNot(vm.snapshot().pages[0], first.pages[0])
+
+    def test_snapshot_sparse(self):
+        vm = self.vm(FAR_MEMORY)
+        run_chained(vm)
+        snapshot = vm.snapshot()
+        self.assertEqual(snapshot.pages, {})
+        self.assertEqual(snapshot.sparse, {5000000: 42})
+        vm.reset()
+        vm.restore(snapshot)
+        self.assertEqual(vm.tape[5000000], 42)
+
+    def test_fork(self):
+        vm = self.vm(ACCUMULATOR)
+        self.assertEqual(feed(vm, [5]), [5])
+        child = vm.fork()
+        self.assertEqual(feed(child, [1]), [6])
+        self.assertEqual(feed(vm, [2]), [7])
+        self.assertEqual(child.backend, vm.backend)
+        self.assertIs(child.program, vm.program)
+        self.assertIs(child.tape.image, vm.tape.image)
+        self.assertIsNot(child.tape.cells, vm.tape.cells)
+
+    def test_run(self):
+        vm = self.vm(ACCUMULATOR)
+        vm.add_inputs([1, 2, 3])
+        self.assertFalse(vm.run())
+        self.assertEqual(vm.take_outputs(), [1, 3, 6])
+        self.assertEqual(vm.outputs, [])
+        vm.add_inputs([4])
+        self.assertFalse(vm.run())
+        self.assertEqual(vm.take_outputs(), [10])
+
+        vm = self.vm(QUINE)
+        self.assertTrue(vm.run())
+        self.assertTrue(vm.halted)
+        self.assertEqual(vm.take_outputs(), QUINE)
+
+    def test_interact(self):
+        session = self.vm(ACCUMULATOR).interact()
+        self.assertEqual(next(session), [])
+        self.assertEqual(session.send([1, 2]), [1, 3])
+        self.assertEqual(session.send([3]), [6])
+
+        session = self.vm(DOUBLER).interact()
+        self.assertEqual(next(session), [])
+        with self.assertRaises(StopIteration) as context:
+            session.send([21])
+        self.assertEqual(context.exception.value, [42])
+
+    def test_run_async(self):
+        async def chain() -> int:
+            queues = [asyncio.Queue() for _ in range(4)]
+            tasks = [
+                self.vm(DOUBLER).run_async(queues[i], queues[i + 1]) for i in range(len(queues) - 1)
+            ]
+            queues[0].put_nowait(5)
+            await asyncio.gather(*tasks)
+            return queues[-1].get_nowait()
+
+        self.assertEqual(asyncio.run(chain()), 40)
+
+    def test_amplifier_chain(self):
+        vms = [self.vm(AMPLIFIER) for _ in range(5)]
+        for vm, phase in zip(vms, [4, 3, 2, 1, 0]):
+            vm.add_inputs([phase])
+        vms[0].add_inputs([0])
+        network = Network.chain(vms)
+        self.assertTrue(network.run())
+        self.assertEqual(list(network.undelivered), [(5, (43210,))])
+
+    def test_feedback_chain(self):
+        vms = [self.vm(FEEDBACK_AMPLIFIER) for _ in range(5)]
+        for vm, phase in zip(vms, [9, 8, 7, 6, 5]):
+            vm.add_inputs([phase])
+        vms[0].add_inputs([0])
+        network = Network.chain(vms, feedback=True)
+        self.assertTrue(network.run())
+        self.assertEqual(vms[-1].last_output, 139629729)
+        self.assertTrue(all(network.steps()))
+
+    def test_network_idle(self):
+        network = Network([self.vm(REPORTER) for _ in range(3)], idle_input=-1)
+        for address in range(3):
+            network.send(address, [address])
+        network.send(1, [7])
+        idle = []
+
+        def nat(network: Network) -> bool:
+            idle.append(list(network.undelivered))
+            network.undelivered.clear()
+            if len(idle) == 1:
+                network.send(2, [8])
+            return len(idle) < 2
+
+        self.assertFalse(network.run(nat))
+        self.assertEqual(idle, [[(255, (7, 1))], [(255, (8, 2))]])
+
+    def test_profile(self):
+        vm = self.vm(ACCUMULATOR)
+        vm.profile = Profile()
+        vm.add_inputs([1, 2, 3])
+        self.assertFalse(vm.run())
+        self.assertEqual(vm.take_outputs(), [1, 3, 6])
+        self.assertEqual(vm.steps, 12)
+        self.assertEqual(vm.profile.steps, 12)
+        self.assertEqual((vm.profile.inputs, vm.profile.outputs), (3, 3))
+        self.assertEqual(vm.profile.addresses, {0: 3, 2: 3, 6: 3, 8: 3})
+        self.assertEqual(vm.profile.blocks, {0: 3})
+        report = json.loads(vm.profile.to_json())
+        self.assertEqual(report["opcodes"], {"in": 3, "add": 3, "out": 3, "jnz": 3})
+        self.assertIn("steps/sec", vm.profile.table())
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, lambda: Intcode([99], backend="jit"))
+
+
+class CompiledIntcodeUnitTests(IntcodeUnitTests):
+    backend = "compiled"
+
+
+class SweepUnitTests(unittest.TestCase):
+    program = [1, 0, 0, 0, 99, 10, 20, 30]
+    space = list(itertools.product(range(8), repeat=2))
+
+    def test_sweep(self):
+        expected = {
+            (noun, verb): ([1, noun, verb] + self.program[3:])[noun]
+            + ([1, noun, verb] + self.program[3:])[verb]
+            for noun, verb in self.space
+        }
+        for workers in (1, 2):
+            results = dict(sweep(self.program, self.space, gravity_assist, workers=workers))
+            self.assertEqual(results, expected)
+
+    def test_sweep_unconsumed_inputs(self):
+        # the program reads one of the two inputs it is given each time
+        results = sweep([3, 5, 4, 5, 99, 0], [1, 2, 3], echo_twice, workers=1)
+        self.assertEqual(sorted(results), [(1, 1), (2, 2), (3, 3)])
+
+    def test_sweep_until(self):
+        results = list(sweep(self.program, self.space, gravity_assist, 2, lambda r: r == 50))
+        self.assertEqual(results[-1][1], 50)
+        self.assertNotIn(50, [result for _, result in results[:-1]])
+
+    def test_sweep_phases(self):
+        results = sweep(
+            FEEDBACK_AMPLIFIER, itertools.permutations(range(5, 10)), amplify, workers=2
+        )
+        self.assertEqual(max(result for _, result in results), 139629729)
+
+
+class DisassemblerUnitTests(unittest.TestCase):
+    def test_blocks(self):
+        cfg = disassemble(QUINE)
+        self.assertEqual(sorted(cfg.blocks), [0, 15])
+        self.assertEqual(cfg.blocks[0].successors, [0, 15])
+        self.assertEqual(cfg.blocks[15].successors, [])
+        self.assertEqual(cfg.back_edges(), [(0, 0)])
+        self.assertEqual(cfg.predecessors(), {0: [0], 15: [0]})
+        self.assertEqual(cfg.data, [])
+        self.assertEqual(
+            [str(instruction) for instruction in cfg.instructions()],
+            [
+                "    0: rbo 1",
+                "    2: out @-1",
+                "    4: add $100, 1, $100",
+                "    8: eq $100, 16, $101",
+                "   12: jz $101, 0",
+                "   15: halt",
+            ],
+        )
+
+    def test_data(self):
+        cfg = disassemble([1, 9, 10, 3, 2, 3, 11, 0, 99, 30, 40, 50])
+        self.assertEqual(list(cfg.blocks), [0])
+        self.assertEqual(cfg.data, [9, 10, 11])
+
+    def test_constant_jumps(self):
+        cfg = disassemble([1105, 1, 4, 99, 1106, 1, 3, 99])
+        self.assertEqual(sorted(cfg.blocks), [0, 4, 7])
+        self.assertEqual(cfg.blocks[0].successors, [4])
+        self.assertEqual(cfg.blocks[4].successors, [7])
+        self.assertEqual(cfg.data, [3])
+
+    def test_indirect_jump(self):
+        cfg = disassemble([3, 9, 5, 9, 10, 99, 0, 0, 0, 0, 0])
+        self.assertTrue(cfg.blocks[0].indirect)
+        self.assertEqual(cfg.blocks[0].successors, [5])
+        self.assertEqual(cfg.data, [6, 7, 8, 9, 10])
+
+
+class MemoryUnitTests(unittest.TestCase):
+    def test_read_write(self):
+        memory = Memory([1, 2, 3], 8)
+        self.assertEqual(memory[2], 3)
+        self.assertEqual(memory[7], 0)
+        self.assertEqual(memory[10**9], 0)
+        memory[10**9] = 5
+        self.assertEqual(memory[10**9], 5)
+        self.assertRaises(IndexError, lambda: memory[-1])
+        self.assertRaises(ValueError, lambda: Memory([1, 2, 3], 2))
+
+    def test_list_api(self):
+        memory = Memory([1, 2, 3], 8)
+        memory[10**9] = 5
+        self.assertEqual(len(memory), 8)
+        self.assertEqual(list(memory), [1, 2, 3, 0, 0, 0, 0, 0])
+        self.assertEqual(memory[1:4], [2, 3, 0])
+        self.assertIn(3, memory)
+        self.assertNotIn(5, memory)
+
+    def test_reset_restores_dirty_pages(self):
+        program = list(range(1000))
+        memory = Memory(program, 2048)
+        memory[3] = -1
+        memory[1500] = -1
+        memory[5000] = -1
+        self.assertEqual(memory.dirty_pages(), [0, 1500 >> Memory.PAGE_BITS])
+        memory.reset()
+        self.assertEqual(memory.dirty_pages(), [])
+        self.assertEqual(memory.cells, program + [0] * 1048)
+        self.assertEqual(memory[5000], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import unittest
-from aoclib.geometry import Point
+from aoclib.geometry import FrozenPoint, Point
 
 
 class PointUnitTests(unittest.TestCase):
@@ -71,5 +71,58 @@ class PointUnitTests(unittest.TestCase):
         self.assertEqual(x.manhattan_distance(Point(-3, -3)), 6)
 
 
+class FrozenPointUnitTests(unittest.TestCase):
+    def test_constructor(self):
+        self.assertEqual(FrozenPoint(), FrozenPoint(0, 0))
+        p = FrozenPoint(y=25, x=10)
+        self.assertEqual((p.x, p.y), (10, 25))
+        with self.assertRaises(AttributeError):
+            p.x = 5
+
+    def test_hashable(self):
+        seen = {FrozenPoint(1, 2), FrozenPoint(1, 2), FrozenPoint(2, 1)}
+        self.assertEqual(len(seen), 2)
+        self.assertIn(FrozenPoint(2, 1), seen)
+
+    def test_operators(self):
+        x = FrozenPoint(100, 100)
+        y = FrozenPoint(35, 35)
+        self.assertEqual(x + y, FrozenPoint(135, 135))
+        self.assertEqual(x - y, FrozenPoint(65, 65))
+        self.assertIsInstance(x + y, FrozenPoint)
+        self.assertEqual(x + (1, 2), FrozenPoint(101, 102))
+        self.assertEqual(y * 2, FrozenPoint(70, 70))
+        self.assertEqual(2 * y, FrozenPoint(70, 70))
+        self.assertEqual(-y, FrozenPoint(-35, -35))
+        self.assertEqual(x.offset(-25, -50), FrozenPoint(75, 50))
+        self.assertEqual(x, FrozenPoint(100, 100))
+
+    def test_mixed_operators(self):
+        x = FrozenPoint(1, 2)
+        self.assertEqual(x + Point(1, 1), FrozenPoint(2, 3))
+        self.assertEqual(x - Point(1, 1), FrozenPoint(0, 1))
+        self.assertIsInstance(x + Point(1, 1), FrozenPoint)
+        self.assertEqual(Point(1, 1) + x, Point(2, 3))
+        self.assertEqual(Point(1, 1) - x, Point(0, -1))
+        self.assertEqual(x.manhattan_distance(Point(4, 6)), 7)
+        self.assertEqual(Point(4, 6).manhattan_distance(x), 7)
+
+    def test_manhattan_distance(self):
+        x = FrozenPoint(0, 0)
+        self.assertEqual(x.manhattan_distance(FrozenPoint(1, 1)), 2)
+        self.assertEqual(x.manhattan_distance(FrozenPoint(-3, -3)), 6)
+
+    def test_neighbors(self):
+        p = FrozenPoint(5, 5)
+        self.assertEqual(set(p.neighbors4()), {(5, 4), (6, 5), (5, 6), (4, 5)})
+        self.assertEqual(len(set(p.neighbors8())), 8)
+        self.assertTrue(set(p.neighbors4()) < set(p.neighbors8()))
+        self.assertTrue(all(abs(n.x - 5) <= 1 and abs(n.y - 5) <= 1 for n in p.neighbors8()))
+
+    def test_conversion(self):
+        self.assertEqual(Point(3, 4).freeze(), FrozenPoint(3, 4))
+        self.assertEqual(FrozenPoint(3, 4).thaw(), Point(3, 4))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+from aoclib.geometry import FrozenPoint, Point, Rectangle
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class PointArrayUnitTests(unittest.TestCase):
+    def setUp(self):
+        from aoclib.points import PointArray
+
+        self.points = PointArray([Point(1, 2), FrozenPoint(-3, 4), (5, -6), (1, 2)])
+
+    def test_constructor(self):
+        from aoclib.points import PointArray
+
+        self.assertEqual(len(self.points), 4)
+        self.assertEqual(len(PointArray()), 0)
+        self.assertEqual(self.points[1], FrozenPoint(-3, 4))
+        self.assertEqual(list(self.points)[2], FrozenPoint(5, -6))
+        self.assertEqual(PointArray.from_columns([1, -3, 5, 1], [2, 4, -6, 2]), self.points)
+        self.assertEqual(self.points[1:3], PointArray([(-3, 4), (5, -6)]))
+        with self.assertRaises(ValueError):
+            PointArray.from_columns([1, 2], [3])
+
+    def test_translate(self):
+        from aoclib.points import PointArray
+
+        self.points.translate(10, -1)
+        self.assertEqual(self.points, PointArray([(11, 1), (7, 3), (15, -7), (11, 1)]))
+
+    def test_manhattan_distances(self):
+        self.assertEqual(self.points.manhattan_distances(Point(0, 0)).tolist(), [3, 7, 11, 3])
+        self.assertEqual(
+            self.points.manhattan_distances((1, 2)).tolist(),
+            [Point(1, 2).manhattan_distance(p) for p in self.points],
+        )
+        matrix = self.points.pairwise_manhattan_distances()
+        self.assertEqual(matrix.shape, (4, 4))
+        self.assertEqual(matrix[0].tolist(), [0, 6, 12, 0])
+        self.assertTrue((matrix == matrix.T).all())
+
+    def test_bounding_box(self):
+        from aoclib.points import PointArray
+
+        box = self.points.bounding_box()
+        self.assertEqual(box, Rectangle(-3, -6, 5, 4))
+        self.assertTrue(all(box.pt_in_rect(point) for point in self.points))
+        self.assertEqual(PointArray().bounding_box(), Rectangle())
+
+    def test_unique_and_membership(self):
+        from aoclib.points import PointArray
+
+        self.assertEqual(self.points.unique(), PointArray([(1, 2), (-3, 4), (5, -6)]))
+        self.assertIn(Point(5, -6), self.points)
+        self.assertIn((1, 2), self.points)
+        self.assertNotIn(FrozenPoint(2, 1), self.points)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,16 @@
 # -*- coding: utf-8 -*-
 
+import random
 import unittest
-from aoclib.geometry import Rectangle, Point, Size
+from aoclib.geometry import (
+    coverage_area,
+    FrozenPoint,
+    Rectangle,
+    RectangleIndex,
+    Point,
+    Size,
+    union_area,
+)
 
 
 class RectangleUnitTests(unittest.TestCase):
@@ -44,16 +53,22 @@ class RectangleUnitTests(unittest.TestCase):
         y = x + Point(35, 65)
         self.assertEqual(y, Rectangle(135, 300, 235, 400))
 
+        self.assertEqual(x, Rectangle(100, 235, 200, 335))
+
         x = Rectangle(100, 235, 200, 335)
         y = x + Rectangle(1, 2, 3, 4)
         self.assertEqual(y, Rectangle(101, 237, 203, 339))
+        self.assertEqual(x, Rectangle(100, 235, 200, 335))
+        self.assertEqual(x + FrozenPoint(35, 65), Rectangle(135, 300, 235, 400))
 
         self.assertRaises(TypeError, lambda: x + (1, 1))
 
     def test_operator_add_eq(self):
         x = Rectangle(100, 235, 200, 335)
+        y = x
         x += Point(35, 65)
         self.assertEqual(x, Rectangle(135, 300, 235, 400))
+        self.assertIs(x, y)
 
         x = Rectangle(100, 235, 200, 335)
         x += Rectangle(1, 2, 3, 4)
@@ -64,9 +79,12 @@ class RectangleUnitTests(unittest.TestCase):
         y = x - Point(35, 65)
         self.assertEqual(y, Rectangle(65, 170, 165, 270))
 
+        self.assertEqual(x, Rectangle(100, 235, 200, 335))
+
         x = Rectangle(100, 235, 200, 335)
         y = x - Rectangle(1, 2, 3, 4)
         self.assertEqual(y, Rectangle(99, 233, 197, 331))
+        self.assertEqual(x, Rectangle(100, 235, 200, 335))
 
         self.assertRaises(TypeError, lambda: x - 13)
 
@@ -78,6 +96,24 @@ class RectangleUnitTests(unittest.TestCase):
         x -= Rectangle(1, 2, 3, 4)
         self.assertEqual(x, Rectangle(99, 233, 197, 331))
 
+    def test_offset_many(self):
+        rects = [Rectangle(0, 0, 10, 10), Rectangle(5, 5, 6, 7)]
+        first = rects[0]
+        Rectangle.offset_many(rects, 3, -2)
+        self.assertEqual(rects, [Rectangle(3, -2, 13, 8), Rectangle(8, 3, 9, 5)])
+        self.assertIs(rects[0], first)
+
+    def test_union_and_intersect_all(self):
+        rects = [Rectangle(0, 0, 10, 10), Rectangle(5, -5, 15, 8), Rectangle(2, 3, 12, 9)]
+        self.assertEqual(Rectangle.union_all(rects), Rectangle(0, -5, 15, 10))
+        self.assertEqual(Rectangle.intersect_all(rects), Rectangle(5, 3, 10, 8))
+        self.assertEqual(
+            Rectangle.intersect_all(iter(rects)), rects[0].intersect(rects[1]).intersect(rects[2])
+        )
+        self.assertEqual(Rectangle.union_all([]), Rectangle())
+        self.assertEqual(Rectangle.intersect_all([]), Rectangle())
+        self.assertEqual(rects[0], Rectangle(0, 0, 10, 10))
+
     def test_bottom_right(self):
         rc = Rectangle(210, 150, 350, 900)
         pt = rc.bottom_right()
@@ -134,6 +170,13 @@ class RectangleUnitTests(unittest.TestCase):
         self.assertFalse(some.is_null())
         self.assertFalse(null.is_null())
 
+    def test_overlaps(self):
+        rc = Rectangle(0, 0, 10, 10)
+        self.assertTrue(rc.overlaps(Rectangle(5, 5, 15, 15)))
+        self.assertTrue(rc.overlaps(Rectangle(2, 2, 3, 3)))
+        self.assertFalse(rc.overlaps(Rectangle(10, 0, 20, 10)))
+        self.assertFalse(rc.overlaps(Rectangle(3, 3, 3, 8)))
+
     def test_move_to_x(self):
         rc = Rectangle(0, 0, 100, 100)
         rc.move_to_x(10)
@@ -184,11 +227,22 @@ class RectangleUnitTests(unittest.TestCase):
         self.assertTrue(isinstance(sz, Size))
         self.assertEqual(sz, Size(40, 40))
 
-    # def test_subtract_rect(self):
-    #     x = Rectangle(10, 10, 100, 100)
-    #     y = Rectangle(50, 10, 150, 150)
-    #     z = x.subtract_rect(y)
-    #     self.assertEqual(x, Rectangle(10, 10, 50, 100))
+    def test_subtract_rect(self):
+        x = Rectangle(10, 10, 100, 100)
+        y = Rectangle(50, 10, 150, 150)
+        z = x.subtract_rect(y)
+        self.assertEqual(z, [Rectangle(10, 10, 50, 100)])
+        self.assertEqual(x, Rectangle(10, 10, 100, 100))
+
+        # a hole in the middle leaves four pieces
+        pieces = x.subtract_rect(Rectangle(40, 40, 60, 60))
+        self.assertEqual(len(pieces), 4)
+        self.assertEqual(sum(rc.width() * rc.height() for rc in pieces), 90 * 90 - 20 * 20)
+        self.assertEqual(union_area(pieces), 90 * 90 - 20 * 20)
+
+        self.assertEqual(x.subtract_rect(Rectangle(200, 200, 300, 300)), [x])
+        self.assertEqual(x.subtract_rect(Rectangle(0, 0, 200, 200)), [])
+        self.assertEqual(Rectangle(5, 5, 5, 9).subtract_rect(x), [])
 
     def test_top_left(self):
         x = Rectangle(128, 128, 256, 256)
@@ -207,5 +261,101 @@ class RectangleUnitTests(unittest.TestCase):
         self.assertEqual(x.width(), 60)
 
 
+class CoverageUnitTests(unittest.TestCase):
+    def test_claims(self):
+        # three claims of which the first two overlap on a 2x2 square
+        claims = [Rectangle(1, 3, 5, 7), Rectangle(3, 1, 7, 5), Rectangle(5, 5, 7, 7)]
+        self.assertEqual(union_area(claims), 32)
+        self.assertEqual(coverage_area(claims, 2), 4)
+        self.assertEqual(coverage_area(claims, 3), 0)
+        self.assertEqual(union_area([]), 0)
+        self.assertEqual(union_area([Rectangle(0, 0, 0, 10)]), 0)
+        self.assertRaises(ValueError, lambda: coverage_area(claims, 0))
+
+    def test_large_coordinates(self):
+        big = 10**12
+        rects = [Rectangle(0, 0, big, big), Rectangle(big // 2, big // 2, 2 * big, 2 * big)]
+        self.assertEqual(union_area(rects), 3 * big * big)
+        self.assertEqual(coverage_area(rects, 2), (big // 2) ** 2)
+
+    def test_against_rasterizing(self):
+        rng = random.Random(3)
+        rects = []
+        for _ in range(60):
+            left, top = rng.randrange(-20, 40), rng.randrange(-20, 40)
+            rects.append(
+                Rectangle(left, top, left + rng.randrange(0, 15), top + rng.randrange(1, 15))
+            )
+        cells = {}
+        for rc in rects:
+            for x in range(rc.left, rc.right):
+                for y in range(rc.top, rc.bottom):
+                    cells[x, y] = cells.get((x, y), 0) + 1
+        for k in range(1, 6):
+            expected = sum(1 for covered in cells.values() if covered >= k)
+            self.assertEqual(coverage_area(rects, k), expected)
+
+
+class RectangleIndexUnitTests(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(2018)
+        self.rectangles = []
+        for _ in range(500):
+            left, top = rng.randrange(1000), rng.randrange(1000)
+            self.rectangles.append(
+                Rectangle(left, top, left + rng.randrange(1, 60), top + rng.randrange(1, 60))
+            )
+        self.index = RectangleIndex(self.rectangles, capacity=8)
+        self.probes = [Point(rng.randrange(-50, 1050), rng.randrange(-50, 1050)) for _ in range(50)]
+
+    def test_containing(self):
+        for point in self.probes:
+            expected = [i for i, rc in enumerate(self.rectangles) if rc.pt_in_rect(point)]
+            self.assertEqual(self.index.containing(point), expected)
+        rc = self.rectangles[7]
+        self.assertIn(7, self.index.containing(rc.bottom_right()))
+
+    def test_overlapping(self):
+        for point in self.probes:
+            query = Rectangle(point.x, point.y, point.x + 40, point.y + 25)
+            expected = [i for i, rc in enumerate(self.rectangles) if rc.overlaps(query)]
+            self.assertEqual(self.index.overlapping(query), expected)
+
+    def test_overlapping_pairs(self):
+        expected = [
+            (i, j)
+            for i, a in enumerate(self.rectangles)
+            for j, b in enumerate(self.rectangles)
+            if i < j and a.overlaps(b)
+        ]
+        self.assertEqual(sorted(self.index.overlapping_pairs()), expected)
+
+    def test_nearest(self):
+        def distance(rc, point):
+            return max(rc.left - point.x, 0, point.x - rc.right) + max(
+                rc.top - point.y, 0, point.y - rc.bottom
+            )
+
+        for point in self.probes:
+            expected = sorted(
+                range(len(self.rectangles)),
+                key=lambda i: (distance(self.rectangles[i], point), i),
+            )
+            self.assertEqual(self.index.nearest(point), expected[:1])
+            self.assertEqual(self.index.nearest(point, 5), expected[:5])
+
+    def test_small_and_empty(self):
+        index = RectangleIndex([Rectangle(0, 0, 5, 5)])
+        self.assertEqual(index.containing(Point(5, 5)), [0])
+        self.assertEqual(index.nearest(Point(9, 9), 3), [0])
+        empty = RectangleIndex([])
+        self.assertEqual(len(empty), 0)
+        self.assertEqual(empty.containing(Point(0, 0)), [])
+        self.assertEqual(empty.nearest(Point(0, 0)), [])
+        self.assertEqual(list(empty.overlapping_pairs()), [])
+        with self.assertRaises(ValueError):
+            RectangleIndex([Rectangle(0, 0, 5, 5)], capacity=1)
+
+
 if __name__ == "__main__":
     unittest.main()
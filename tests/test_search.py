@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+from typing import Iterator, List, Tuple
+from aoclib.edge import Edge
+from aoclib.search import (
+    astar,
+    beam_search,
+    bfs,
+    bidirectional_astar,
+    bidirectional_bfs,
+    cached_successors,
+    ContractedGraph,
+    dfs,
+    dijkstra,
+    ida_star,
+    node_to_path,
+    parallel_bfs,
+    parents_to_path,
+    SearchStats,
+    StateCodec,
+)
+
+Cell = Tuple[int, int]
+
+MAZE = [
+    "#########",
+    "#S..#...#",
+    "#.#.#.#.#",
+    "#.#...#.#",
+    "#.#####.#",
+    "#......G#",
+    "#########",
+]
+
+
+def find(maze: List[str], marker: str) -> Cell:
+    for y, row in enumerate(maze):
+        if marker in row:
+            return (row.index(marker), y)
+    raise ValueError(marker)
+
+
+def open_neighbors(maze: List[str]):
+    def successors(cell: Cell) -> Iterator[Cell]:
+        x, y = cell
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if maze[ny][nx] != "#":
+                yield (nx, ny)
+
+    return successors
+
+
+def maze_successors(cell: Cell) -> List[Cell]:
+    return list(open_neighbors(MAZE)(cell))
+
+
+def manhattan_to(goal: Cell):
+    return lambda cell: abs(cell[0] - goal[0]) + abs(cell[1] - goal[1])
+
+
+class SearchUnitTests(unittest.TestCase):
+    def setUp(self):
+        self.start = find(MAZE, "S")
+        self.goal = find(MAZE, "G")
+        self.successors = open_neighbors(MAZE)
+
+    def test_bfs_dfs(self):
+        node = bfs(self.start, lambda cell: cell == self.goal, self.successors)
+        self.assertEqual(len(node_to_path(node)), 11)
+        node = dfs(self.start, lambda cell: cell == self.goal, self.successors)
+        self.assertEqual(node_to_path(node)[-1], self.goal)
+
+    def test_astar(self):
+        for closed in (False, True):
+            node = astar(
+                self.start,
+                lambda cell: cell == self.goal,
+                self.successors,
+                manhattan_to(self.goal),
+                closed=closed,
+            )
+            path = node_to_path(node)
+            self.assertEqual(node.cost, 10)
+            self.assertEqual(len(path), 11)
+            self.assertEqual(path[0], self.start)
+            self.assertEqual(path[-1], self.goal)
+            self.assertEqual(node.parent.cost, 9)
+
+    def test_astar_weighted(self):
+        # the direct edge is expensive, the detour through "b" is cheaper
+        graph = {"a": [("c", 10), ("b", 1)], "b": [("c", 2)], "c": []}
+        node = astar("a", lambda s: s == "c", graph.__getitem__, lambda s: 0, weighted=True)
+        self.assertEqual(node_to_path(node), ["a", "b", "c"])
+        self.assertEqual(node.cost, 3)
+
+    def test_astar_unreachable(self):
+        self.assertIsNone(
+            astar(self.start, lambda cell: False, self.successors, manhattan_to(self.goal))
+        )
+
+    def test_dijkstra(self):
+        distances, parents = dijkstra([self.start], self.successors)
+        self.assertEqual(distances[self.goal], 10)
+        self.assertEqual(distances[self.start], 0)
+        self.assertEqual(len(distances), 24)
+        path = parents_to_path(parents, self.goal)
+        self.assertEqual(path[0], self.start)
+        self.assertEqual(len(path), 11)
+
+    def test_dijkstra_sources_and_targets(self):
+        distances, parents = dijkstra([self.start, self.goal], self.successors)
+        self.assertEqual(max(distances.values()), 7)
+        self.assertEqual(parents_to_path(parents, (7, 1))[0], self.goal)
+
+        distances, _ = dijkstra([self.start], self.successors, targets=[(3, 1)])
+        self.assertEqual(distances[(3, 1)], 2)
+        self.assertNotIn(self.goal, distances)
+
+    def test_dijkstra_weighted(self):
+        graph = {"a": [("c", 10), ("b", 1)], "b": [("c", 2), ("d", 8)], "c": [], "d": []}
+        distances, parents = dijkstra(["a"], graph.__getitem__, weighted=True)
+        self.assertEqual(distances, {"a": 0, "b": 1, "c": 3, "d": 9})
+        self.assertEqual(parents_to_path(parents, "c"), ["a", "b", "c"])
+
+        distances, _ = dijkstra(["a"], graph.__getitem__, targets={"b"}, weighted=True)
+        self.assertNotIn("d", distances)
+
+        # "b" is found at cost 10 before the cheaper path through "c" is settled
+        graph = {"a": [("b", 10), ("c", 1)], "c": [("b", 1)], "b": []}
+        distances, parents = dijkstra(["a"], graph.__getitem__, targets={"c"}, weighted=True)
+        self.assertEqual(distances, {"a": 0, "c": 1})
+        self.assertEqual(parents, {"a": None, "c": "a"})
+
+    def test_dijkstra_single_source(self):
+        # a tuple state must be wrapped, or its coordinates become the sources
+        distances, parents = dijkstra([self.start], self.successors, targets=[self.start])
+        self.assertEqual(distances, {self.start: 0})
+        self.assertEqual(parents, {self.start: None})
+
+    def test_bidirectional_bfs(self):
+        node = bidirectional_bfs(self.start, self.goal, self.successors)
+        path = node_to_path(node)
+        self.assertEqual(len(path), 11)
+        self.assertEqual(path[0], self.start)
+        self.assertEqual(path[-1], self.goal)
+        self.assertEqual(node.cost, 10)
+        for a, b in zip(path, path[1:]):
+            self.assertIn(b, list(self.successors(a)))
+
+        self.assertEqual(
+            node_to_path(bidirectional_bfs(self.start, self.start, self.successors)), [self.start]
+        )
+
+    def test_bidirectional_bfs_directed(self):
+        # a cycle 0 -> 1 -> ... -> 9 -> 0 with a shortcut 2 -> 7
+        forward = {n: [(n + 1) % 10] for n in range(10)}
+        forward[2].append(7)
+        backward = {n: [m for m in forward if n in forward[m]] for n in forward}
+        node = bidirectional_bfs(0, 8, forward.__getitem__, backward.__getitem__)
+        self.assertEqual(node_to_path(node), [0, 1, 2, 7, 8])
+        self.assertIsNone(bidirectional_bfs(0, 10, forward.get, lambda n: []))
+
+    def test_bidirectional_astar(self):
+        def heuristic(a, b):
+            return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+        node = bidirectional_astar(self.start, self.goal, self.successors, heuristic)
+        path = node_to_path(node)
+        self.assertEqual(node.cost, 10)
+        self.assertEqual(len(path), 11)
+        self.assertEqual((path[0], path[-1]), (self.start, self.goal))
+        self.assertEqual([n.cost for n in (node, node.parent)], [10, 9])
+
+    def test_bidirectional_astar_weighted(self):
+        graph = {"a": [("c", 10), ("b", 1)], "b": [("c", 2), ("a", 1)], "c": [("a", 10), ("b", 2)]}
+        node = bidirectional_astar("a", "c", graph.__getitem__, lambda s, t: 0, weighted=True)
+        self.assertEqual(node_to_path(node), ["a", "b", "c"])
+        self.assertEqual(node.cost, 3)
+        graph["d"] = []
+        self.assertIsNone(
+            bidirectional_astar("a", "d", graph.__getitem__, lambda s, t: 0, weighted=True)
+        )
+
+    def test_codec(self):
+        width = len(MAZE[0])
+        codec = StateCodec(
+            lambda cell: cell[1] * width + cell[0],
+            lambda code: divmod(code, width)[::-1],
+            width * len(MAZE),
+        )
+
+        def is_goal(cell):
+            return cell == self.goal
+
+        expected = node_to_path(bfs(self.start, is_goal, self.successors))
+        self.assertEqual(
+            node_to_path(bfs(self.start, is_goal, self.successors, codec=codec)), expected
+        )
+        node = dfs(self.start, is_goal, self.successors, codec=codec)
+        self.assertEqual(node_to_path(node)[0], self.start)
+        self.assertEqual(node.state, self.goal)
+        for closed in (False, True):
+            node = astar(
+                self.start,
+                is_goal,
+                self.successors,
+                manhattan_to(self.goal),
+                closed=closed,
+                codec=codec,
+            )
+            self.assertEqual(node.cost, 10)
+            self.assertEqual(node_to_path(node)[0], self.start)
+        self.assertIsNone(bfs(self.start, lambda cell: False, self.successors, codec=codec))
+
+        stats = SearchStats()
+        reports = []
+        astar(
+            self.start,
+            lambda cell: False,
+            self.successors,
+            manhattan_to(self.goal),
+            codec=codec,
+            stats=stats,
+            callback=lambda s: reports.append(s.explored),
+            every=10,
+        )
+        self.assertEqual((stats.expanded, stats.explored, stats.frontier), (24, 24, 0))
+        self.assertEqual(len(reports), 2)
+
+    def test_codec_weighted(self):
+        names = "abc"
+        codec = StateCodec(names.index, names.__getitem__, len(names))
+        graph = {"a": [("c", 10), ("b", 1)], "b": [("c", 2)], "c": []}
+        node = astar(
+            "a", lambda s: s == "c", graph.__getitem__, lambda s: 0, weighted=True, codec=codec
+        )
+        self.assertEqual(node_to_path(node), ["a", "b", "c"])
+        self.assertEqual(node.cost, 3)
+
+    def test_ida_star(self):
+        stats = SearchStats()
+        node = ida_star(
+            self.start,
+            lambda cell: cell == self.goal,
+            self.successors,
+            manhattan_to(self.goal),
+            stats=stats,
+        )
+        path = node_to_path(node)
+        self.assertEqual(node.cost, 10)
+        self.assertEqual((path[0], path[-1], len(path)), (self.start, self.goal, 11))
+        self.assertGreater(stats.expanded, 10)
+        self.assertEqual(stats.peak_frontier, 10)
+        self.assertIsNone(
+            ida_star(self.start, lambda cell: False, self.successors, manhattan_to(self.goal))
+        )
+
+    def test_ida_star_weighted(self):
+        graph = {"a": [("c", 10), ("b", 1)], "b": [("c", 2)], "c": []}
+        node = ida_star("a", lambda s: s == "c", graph.__getitem__, lambda s: 0, weighted=True)
+        self.assertEqual(node_to_path(node), ["a", "b", "c"])
+        self.assertEqual(node.cost, 3)
+
+    def test_beam_search(self):
+        stats = SearchStats()
+        node = beam_search(
+            self.start,
+            lambda cell: cell == self.goal,
+            self.successors,
+            manhattan_to(self.goal),
+            width=2,
+            stats=stats,
+        )
+        self.assertEqual(node.cost, 10)
+        self.assertLessEqual(stats.peak_frontier, 4)
+
+        # a beam of one commits to the first branch and takes the long way round
+        node = beam_search(
+            self.start,
+            lambda cell: cell == self.goal,
+            self.successors,
+            manhattan_to(self.goal),
+            width=1,
+        )
+        self.assertEqual(node.cost, 14)
+
+    def test_beam_search_memory(self):
+        def successors(cell):
+            x, y = cell
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if 0 <= nx < 20 and 0 <= ny < 20:
+                    yield (nx, ny)
+
+        stats = SearchStats()
+        node = beam_search(
+            (0, 0),
+            lambda cell: cell == (19, 19),
+            successors,
+            manhattan_to((19, 19)),
+            width=3,
+            stats=stats,
+        )
+        self.assertEqual(node.cost, 38)
+        # only the states chosen for a beam are remembered
+        self.assertLessEqual(stats.explored, 3 * 38 + 1)
+
+    def test_parallel_bfs(self):
+        expected = node_to_path(bfs(self.start, lambda cell: cell == self.goal, maze_successors))
+        for workers in (1, 2):
+            node = parallel_bfs(
+                self.start,
+                lambda cell: cell == self.goal,
+                maze_successors,
+                workers=workers,
+                chunksize=1,
+            )
+            self.assertEqual(node_to_path(node), expected)
+        self.assertIsNone(
+            parallel_bfs(self.start, lambda cell: False, maze_successors, workers=2, chunksize=2)
+        )
+
+    def test_stats_and_callback(self):
+        for search in (bfs, dfs):
+            stats = SearchStats()
+            reports = []
+            node = search(
+                self.start,
+                lambda cell: cell == self.goal,
+                self.successors,
+                stats=stats,
+                callback=lambda s: reports.append(s.expanded),
+                every=5,
+            )
+            self.assertIsNotNone(node)
+            self.assertGreaterEqual(stats.explored, stats.expanded)
+            self.assertGreater(stats.peak_frontier, 0)
+            self.assertGreater(stats.peak_memory, 0)
+            self.assertGreater(stats.nodes_per_second, 0)
+            self.assertEqual(reports, list(range(5, stats.expanded + 1, 5)))
+
+        stats = SearchStats()
+        astar(
+            self.start,
+            lambda cell: False,
+            self.successors,
+            manhattan_to(self.goal),
+            stats=stats,
+        )
+        self.assertEqual((stats.expanded, stats.explored, stats.frontier), (24, 24, 0))
+        self.assertEqual(stats.reopened, 0)
+
+    def test_stats_reopened(self):
+        # the heuristic overestimates at "b", so "c" and "d" are first expanded the expensive way
+        graph = {"a": [("b", 1), ("c", 3)], "b": [("c", 1)], "c": [("d", 1)], "d": []}
+        estimates = {"a": 0, "b": 5, "c": 0, "d": 0}
+        for closed, reopened in ((False, 2), (True, 0)):
+            stats = SearchStats()
+            reports = []
+            node = astar(
+                "a",
+                lambda s: s == "x",
+                graph.__getitem__,
+                estimates.__getitem__,
+                weighted=True,
+                closed=closed,
+                stats=stats,
+                callback=lambda s: reports.append(s.expanded),
+                every=1,
+            )
+            self.assertIsNone(node)
+            self.assertEqual(stats.reopened, reopened)
+            # stale frontier entries are skipped without reporting progress again
+            self.assertEqual(reports, list(range(1, stats.expanded + 1)))
+
+    def test_cached_successors(self):
+        calls = []
+
+        def counting(cell):
+            calls.append(cell)
+            return self.successors(cell)
+
+        cached = cached_successors(counting)
+        for _ in range(3):
+            node = astar(
+                self.start, lambda cell: cell == self.goal, cached, manhattan_to(self.goal)
+            )
+            self.assertEqual(node.cost, 10)
+        info = cached.cache_info()
+        self.assertEqual(info.misses, len(calls))
+        self.assertEqual(info.hits, 2 * len(calls))
+        self.assertEqual(len(set(calls)), len(calls))
+
+        cached.cache_clear()
+        self.assertEqual(cached.cache_info().currsize, 0)
+
+        small = cached_successors(counting, maxsize=2)
+        bfs(self.start, lambda cell: False, small)
+        self.assertEqual(small.cache_info().currsize, 2)
+
+    def test_contracted_graph(self):
+        # the maze is a single loop through the start and the goal
+        graph = ContractedGraph([self.start], self.successors, lambda cell: cell == self.goal)
+        self.assertEqual(graph.edges[self.start], [Edge(self.start, self.goal, 10)])
+        self.assertEqual(graph.edges[self.goal], [Edge(self.goal, self.start, 10)])
+
+        graph = ContractedGraph([self.start], self.successors, lambda cell: cell in {(5, 2)})
+        self.assertEqual(set(graph.edges), {self.start, (5, 2)})
+        self.assertEqual(graph.successors(self.start), [((5, 2), 7)])
+
+        graph = ContractedGraph(
+            [self.start, self.goal], self.successors, lambda cell: cell == (5, 2)
+        )
+        self.assertEqual(sorted(graph.successors(self.start)), [((5, 2), 7), (self.goal, 10)])
+        for vertex, edges in graph.edges.items():
+            for edge in edges:
+                self.assertIn(edge.reversed(), graph.edges[edge.v])
+
+        distances, _ = dijkstra([self.start], graph.successors, weighted=True)
+        self.assertEqual(distances[self.goal], 10)
+        node = astar(
+            self.start,
+            lambda cell: cell == self.goal,
+            graph.successors,
+            manhattan_to(self.goal),
+            weighted=True,
+        )
+        self.assertEqual(node.cost, 10)
+
+    def test_edge(self):
+        self.assertEqual(str(Edge(1, 2)), "1 -> 2")
+        self.assertEqual(str(Edge(1, 2, 5)), "1 -> 2 (5)")
+        self.assertEqual(Edge(1, 2, 5).reversed(), Edge(2, 1, 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
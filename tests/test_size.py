@@ -2,7 +2,7 @@
 
 import unittest
 
-from aoclib.geometry import Size
+from aoclib.geometry import FrozenSize, Size
 
 
 class SizeUnitTests(unittest.TestCase):
@@ -57,5 +57,25 @@ class SizeUnitTests(unittest.TestCase):
         self.assertEqual(z, Size(50, 75))
 
 
+class FrozenSizeUnitTests(unittest.TestCase):
+    def test_constructor(self):
+        self.assertEqual(FrozenSize(), FrozenSize(0, 0))
+        self.assertEqual(FrozenSize(cy=25, cx=10), FrozenSize(10, 25))
+
+    def test_operators(self):
+        x = FrozenSize(100, 100)
+        y = FrozenSize(50, 25)
+        self.assertEqual(x + y, FrozenSize(150, 125))
+        self.assertEqual(x - y, FrozenSize(50, 75))
+        self.assertEqual(len({x, FrozenSize(100, 100)}), 1)
+        self.assertEqual(x + Size(1, 2), FrozenSize(101, 102))
+        self.assertEqual(x - Size(1, 2), FrozenSize(99, 98))
+        self.assertEqual(Size(1, 2) + y, Size(51, 27))
+
+    def test_conversion(self):
+        self.assertEqual(Size(3, 4).freeze(), FrozenSize(3, 4))
+        self.assertEqual(FrozenSize(3, 4).thaw(), Size(3, 4))
+
+
 if __name__ == "__main__":
     unittest.main()